@@ -2,7 +2,7 @@
 
 pip install -r requirements.txt
 
-python manage.py makemigrations
 python manage.py migrate
+python manage.py build_responsive_images
 python manage.py collectstatic --noinput
 python manage.py createsuperuser
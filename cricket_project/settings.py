@@ -33,7 +33,11 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'slots.middleware.StaticFilesMiddleware',
+    'slots.middleware.MetricsMiddleware',
+    'slots.middleware.ProfilingMiddleware',
+    'slots.middleware.PreloadLinkMiddleware',
+    'slots.middleware.CachePolicyMiddleware',
 
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -96,10 +100,61 @@ DATABASES = {
 
 
 
-STATIC_URL = "/static/"
-STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# Cache
+# Defaults to a per-process locmem cache; point CACHE_BACKEND/CACHE_LOCATION at
+# a shared backend (e.g. Redis or Memcached) in production.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'cricket-booking'),
+    }
+}
 
+# Sessions
+# cached_db serves session reads from the cache and only falls back to the
+# django_session table on a miss. Set SESSION_ENGINE to
+# 'django.contrib.sessions.backends.signed_cookies' to drop the table entirely.
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+SESSION_CACHE_ALIAS = os.environ.get('SESSION_CACHE_ALIAS', 'default')
+
+# Booking holds
+# Opening the booking page holds the spots for this many seconds
+BOOKING_HOLD_SECONDS = int(os.environ.get('BOOKING_HOLD_SECONDS', 300))
+
+# Metrics
+# /metrics requires "Authorization: Bearer <METRICS_TOKEN>"; with no token
+# set it is a 404 unless DEBUG is on
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Profiling
+# Profile this fraction of requests (0 disables sampling; requests with a
+# signed X-Profile-Token header are always profiled). Output rotates in
+# PROFILING_DIR, keeping the newest PROFILING_KEEP profiles.
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_KEEP = int(os.environ.get('PROFILING_KEEP', 100))
+
+# Slow-query log
+# Queries on the default database slower than SLOW_QUERY_MS (0, the
+# default, disables it) are logged with their EXPLAIN plan; read it with
+# `manage.py slow_queries`. Only parameter types are logged unless
+# SLOW_QUERY_LOG_PARAMS=1 (never for the user and session tables).
+# SLOW_QUERY_EXPLAIN_ANALYZE=1 runs EXPLAIN ANALYZE (PostgreSQL), which
+# executes the SELECT a second time.
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 0))
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', str(BASE_DIR / 'logs' / 'slow_queries.jsonl'))
+SLOW_QUERY_EXPLAIN_ANALYZE = os.environ.get('SLOW_QUERY_EXPLAIN_ANALYZE', '') == '1'
+SLOW_QUERY_LOG_PARAMS = os.environ.get('SLOW_QUERY_LOG_PARAMS', '') == '1'
+
+# Idempotency keys
+# How long a booking/cancel form submission can be replayed (seconds)
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+
+# Calendar feed
+# Slot labels are the venue's wall-clock times; the feed emits them as
+# local times and names this zone for calendar apps (X-WR-TIMEZONE)
+VENUE_TIME_ZONE = os.environ.get('VENUE_TIME_ZONE', 'Asia/Kolkata')
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -117,6 +172,13 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Users created by `manage.py seed_scale` have fast, insecure MD5 password
+# hashes. Load-test deployments set ALLOW_TEST_PASSWORD_HASHER=1 so those
+# users can log in; never set it in production.
+if os.environ.get('ALLOW_TEST_PASSWORD_HASHER', '') == '1':
+    from django.conf import global_settings
+    PASSWORD_HASHERS = [*global_settings.PASSWORD_HASHERS, 'django.contrib.auth.hashers.MD5PasswordHasher']
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 
@@ -130,6 +192,17 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'slots', 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# collectstatic minifies css/ and js/, content-hashes everything and writes
+# .gz/.br siblings; hashed files are served with a one-year immutable
+# Cache-Control by slots.middleware.StaticFilesMiddleware.
+STATICFILES_STORAGE = 'slots.storage.MinifiedManifestStaticFilesStorage'
+STATIC_MINIFY_PREFIXES = ('css/', 'js/')
+# Responsive image variants (manage.py build_responsive_images)
+RESPONSIVE_IMAGE_ROOT = os.path.join(BASE_DIR, 'slots', 'static', 'images', 'responsive')
+RESPONSIVE_IMAGE_STATIC_PREFIX = 'images/responsive/'
+RESPONSIVE_IMAGE_WIDTHS = (320, 640, 1024, 1536)
+# Stylesheets announced with a Link: rel=preload header on every HTML page
+STATIC_PRELOAD = ('css/style.css',)
 
 # Media files
 MEDIA_URL = '/media/'
@@ -143,7 +216,20 @@ LOGIN_URL = 'slots:login'
 LOGIN_REDIRECT_URL = 'slots:dashboard'
 LOGOUT_REDIRECT_URL = 'slots:login'
 
+# Email
+# Booking notifications are delivered by `manage.py run_outbox_worker`.
+# Use 'django.core.mail.backends.locmem.EmailBackend' in tests.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+
 # Messages
+# Flash messages live in a cookie so that writing one doesn't dirty the session.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 MESSAGE_TAGS = {
     'debug': 'debug',
     'info': 'info',
@@ -151,16 +237,3 @@ MESSAGE_TAGS = {
     'warning': 'warning',
     'error': 'danger',
 }
-
-
-
-import os
-
-STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-
-
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
-
-
-
@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration for cricket_project
+Started by `python manage.py boot`; PORT and WEB_CONCURRENCY come from the platform.
+"""
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Import the app once in the master and fork workers from it: faster
+# startup and copy-on-write sharing of the imported code
+preload_app = True
+
+# Prometheus multiprocess mode: each worker writes its metrics to files in
+# this directory and /metrics aggregates them. It must be set before the
+# app (and prometheus_client) is imported, and start empty on every boot.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'cricket-metrics')
+)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live-only samples from the aggregate"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
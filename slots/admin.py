@@ -2,9 +2,28 @@
 Django Admin Configuration for Cricket Slot Booking System
 Customized with filters, search, sorting, and all features
 """
-from django.contrib import admin
-from django.contrib.admin import AdminSite
-from .models import Slot, Booking, Venue
+import csv
+import io
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.contrib import admin, messages
+from django.contrib.admin import AdminSite, helpers
+from django.core.exceptions import PermissionDenied
+from django.db.models import Max, Min
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.html import format_html
+from .models import Slot, Booking, Venue, ArchivedSlot, ArchivedBooking, OutboxMessage
+from .cache import invalidate_availability, invalidate_history
+from .forms import CloseDatesForm, ReportForm, SlotImportForm
+from .importers import import_slots
+from .reports import CSV_HEADER, get_report
+from .filters import CachedFacetChoicesFilter, DateRangeFieldListFilter, UserAutocompleteFilter
+from .search import StructuredSearchMixin
+from .services import BookingError, set_booking_status
 
 
 # ==================== CUSTOM ADMIN SITE ====================
@@ -40,6 +59,7 @@ class VenueAdmin(admin.ModelAdmin):
     """
     list_display = (
         'name', 
+        'slug',
         'total_boxes', 
         'weekday_price', 
         'weekend_price',
@@ -68,10 +88,11 @@ class VenueAdmin(admin.ModelAdmin):
     )
     ordering = ('-created_at', 'name')
     readonly_fields = ('created_at', 'updated_at')
+    prepopulated_fields = {'slug': ('name',)}
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('name', 'total_boxes'),
+            'fields': ('name', 'slug', 'total_boxes'),
             'classes': ('wide',)
         }),
         ('Amenities', {
@@ -114,30 +135,17 @@ class VenueAdmin(admin.ModelAdmin):
         if obj:
             return ('created_at', 'updated_at')
         return ('created_at', 'updated_at')
-    
-    def has_delete_permission(self, request, obj=None):
-        """Prevent deletion of the only venue"""
-        if Venue.objects.count() == 1:
-            return False
-        return super().has_delete_permission(request, obj)
-    
-    def get_actions(self, request):
-        """Remove delete action if only one venue exists"""
-        actions = super().get_actions(request)
-        if Venue.objects.count() <= 1:
-            if 'delete_selected' in actions:
-                del actions['delete_selected']
-        return actions
 
 
 # ==================== SLOT ADMIN ====================
 @admin.register(Slot)
-class SlotAdmin(admin.ModelAdmin):
+class SlotAdmin(StructuredSearchMixin, admin.ModelAdmin):
     """
     Admin interface for Cricket Slots with full customization
     """
     list_display = (
         'id',
+        'venue',
         'date', 
         'time_slot', 
         'cricket_type', 
@@ -145,31 +153,38 @@ class SlotAdmin(admin.ModelAdmin):
         'booked_count',
         'max_players',
         'available_spots',
+        'is_closed',
         'is_available_status',
         'created_at'
     )
     list_filter = (
-        'date',
-        'cricket_type',
-        'time_slot',
-        'price',
-        ('date', admin.DateFieldListFilter),
+        'venue',
+        ('date', DateRangeFieldListFilter),
+        ('cricket_type', CachedFacetChoicesFilter),
+        ('time_slot', CachedFacetChoicesFilter),
+        'is_closed',
     )
+    list_select_related = ('venue',)
+    facet_venue_path = 'venue'  # CachedFacetChoicesFilter counts follow the venue filter
+    # Matched by StructuredSearchMixin.get_search_results
     search_fields = (
-        'date__icontains',
+        'date',
         'time_slot',
         'cricket_type',
     )
+    search_date_field = 'date'
+    search_choice_fields = ('time_slot', 'cricket_type')
+    search_help_text = 'Search by date (2026-01-31, 01/2026, 2026), time slot or cricket type.'
     ordering = ('-date', 'time_slot')
     readonly_fields = ('created_at', 'updated_at')
     
     fieldsets = (
         ('Slot Details', {
-            'fields': ('date', 'time_slot', 'cricket_type', 'price'),
+            'fields': ('venue', 'date', 'time_slot', 'cricket_type', 'price'),
             'classes': ('wide',)
         }),
         ('Capacity & Players', {
-            'fields': ('max_players',),
+            'fields': ('max_players', 'is_closed'),
             'classes': ('wide',)
         }),
         ('Timestamps', {
@@ -178,8 +193,12 @@ class SlotAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """Annotate booking counts once instead of querying per row"""
+        return super().get_queryset(request).with_booked_count()
+    
     def booked_count(self, obj):
-        """Display number of confirmed bookings"""
+        """Display number of players on confirmed bookings"""
         count = obj.booked_count
         max_players = obj.max_players
         return f"{count}/{max_players}"
@@ -187,43 +206,151 @@ class SlotAdmin(admin.ModelAdmin):
     
     def available_spots(self, obj):
         """Display available spots"""
-        available = obj.max_players - obj.booked_count
-        return available
+        return obj.spots_left
     available_spots.short_description = "Available"
     
     def is_available_status(self, obj):
         """Display availability status with color coding"""
+        if obj.is_closed:
+            return format_html('<span style="color: #6B7280;">🔒 Closed</span>')
         if obj.is_available:
-            from django.utils.html import format_html
             return format_html('<span style="color: #22C55E;">✅ Available</span>')
         return format_html('<span style="color: #EF4444;">❌ Full</span>')
     is_available_status.short_description = "Status"
-    is_available_status.admin_order_field = 'is_available'
+    is_available_status.admin_order_field = 'is_closed'
     
     def get_readonly_fields(self, request, obj=None):
         """Additional readonly fields for existing slots"""
         readonly = ('created_at', 'updated_at')
         if obj:
-            # Don't allow changing date/time if bookings exist
+            # Don't allow changing venue/date/time if bookings exist
             if obj.booked_count > 0:
-                readonly += ('date', 'time_slot', 'cricket_type')
+                readonly += ('venue', 'date', 'time_slot', 'cricket_type')
         return readonly
     
-    actions = ['mark_available', 'mark_full']
+    actions = ['mark_available', 'mark_full', 'close_dates']
     
     def mark_available(self, request, queryset):
-        """Reset slot availability (for fully booked slots)"""
-        updated = 0
-        for slot in queryset:
-            # This is a logical reset, actual implementation depends on requirements
-            self.message_user(request, f'Slot {slot.date} - {slot.get_time_slot_display()} marked.')
-        self.message_user(request, f'{updated} slot(s) processed.')
-    mark_available.short_description = "Mark selected slots as available"
+        """Reopen selected slots for booking"""
+        updated = queryset.update(is_closed=False)
+        invalidate_availability()
+        invalidate_history()
+        self.message_user(request, f'✅ {updated} slot(s) opened for booking.')
+    mark_available.short_description = "Open selected slots for booking"
     
     def mark_full(self, request, queryset):
-        """Mark slots as full (prevent further bookings)"""
-        self.message_user(request, 'Slots marked as full.')
-    mark_full.short_description = "Mark selected slots as full"
+        """Close selected slots (prevent further bookings)"""
+        updated = queryset.update(is_closed=True)
+        invalidate_availability()
+        invalidate_history()
+        self.message_user(request, f'🔒 {updated} slot(s) closed for booking.')
+    mark_full.short_description = "Close selected slots for booking"
+    
+    def close_dates(self, request, queryset):
+        """Close every slot in a date range at the selected slots' venues (e.g. venue closed for the day)"""
+        form = None
+        if 'apply' in request.POST:
+            form = CloseDatesForm(request.POST)
+            if form.is_valid():
+                updated = Slot.objects.filter(
+                    venue__in=queryset.values('venue'),
+                    date__range=(form.cleaned_data['start_date'], form.cleaned_data['end_date']),
+                ).update(is_closed=True)
+                invalidate_availability()
+                invalidate_history()
+                self.message_user(request, f'🔒 {updated} slot(s) closed.')
+                return None
+        if form is None:
+            bounds = queryset.aggregate(start_date=Min('date'), end_date=Max('date'))
+            form = CloseDatesForm(initial=bounds)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Close venue for a date range',
+            'opts': self.model._meta,
+            'form': form,
+            'queryset': queryset,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, 'admin/slots/slot/close_dates.html', context)
+    close_dates.short_description = "Close venue for the selected date range"
+    
+    def get_urls(self):
+        """Add the CSV import and report pages"""
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='slots_slot_import'),
+            path('report/', self.admin_site.admin_view(self.report_view), name='slots_slot_report'),
+        ]
+        return urls + super().get_urls()
+    
+    def import_view(self, request):
+        """Create or update slots from an uploaded CSV file, streamed in batches"""
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        result = None
+        if request.method == 'POST':
+            form = SlotImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                # Decode the upload lazily instead of reading it into memory
+                stream = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+                try:
+                    result = import_slots(
+                        stream,
+                        venue=form.cleaned_data['venue'],
+                        update_existing=form.cleaned_data['update_existing'],
+                        dry_run=form.cleaned_data['dry_run'],
+                        max_errors=200,
+                    )
+                except ValueError as exc:
+                    form.add_error('file', str(exc))
+        else:
+            form = SlotImportForm()
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Import slots from CSV',
+            'opts': self.model._meta,
+            'form': form,
+            'result': result,
+        }
+        return TemplateResponse(request, 'admin/slots/slot/import_slots.html', context)
+    
+    def report_view(self, request):
+        """Occupancy, revenue and cancellations over a date range; ?format=csv downloads it"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        today = timezone.localdate()
+        form = ReportForm(request.GET or {
+            'start_date': today - timedelta(days=29),
+            'end_date': today,
+            'group_by': 'day',
+        })
+        report = None
+        if form.is_valid():
+            report = get_report(
+                form.cleaned_data['start_date'],
+                form.cleaned_data['end_date'],
+                form.cleaned_data['group_by'],
+                venue=form.cleaned_data['venue'],
+            )
+            if request.GET.get('format') == 'csv':
+                response = HttpResponse(content_type='text/csv')
+                response['Content-Disposition'] = (
+                    f'attachment; filename="slot-report-{report.venue.slug if report.venue else "all"}-'
+                    f'{report.group_by}-{report.start}-{report.end}.csv"'
+                )
+                writer = csv.writer(response)
+                writer.writerow(CSV_HEADER)
+                writer.writerows(row.as_csv() for row in report.rows)
+                writer.writerow(report.total.as_csv())
+                return response
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Occupancy and revenue report',
+            'opts': self.model._meta,
+            'form': form,
+            'report': report,
+            'csv_query': urlencode({**dict(form.data.items()), 'format': 'csv'}) if report else '',
+        }
+        return TemplateResponse(request, 'admin/slots/slot/report.html', context)
     
     class Media:
         js = ('admin/js/vendor/jquery/jquery.min.js',)
@@ -231,7 +358,7 @@ class SlotAdmin(admin.ModelAdmin):
 
 # ==================== BOOKING ADMIN ====================
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(StructuredSearchMixin, admin.ModelAdmin):
     """
     Admin interface for Bookings with full customization
     """
@@ -239,29 +366,39 @@ class BookingAdmin(admin.ModelAdmin):
         'id',
         'user',
         'slot_info',
+        'players',
         'status',
         'created_at',
         'updated_at'
     )
     list_filter = (
-        'status',
-        ('slot__date', admin.DateFieldListFilter),
-        'slot__cricket_type',
+        ('status', CachedFacetChoicesFilter),
+        'slot__venue',
+        ('slot__date', DateRangeFieldListFilter),
+        ('slot__cricket_type', CachedFacetChoicesFilter),
         'created_at',
-        ('user__username', admin.AllValuesFieldListFilter),
+        UserAutocompleteFilter,
     )
+    facet_venue_path = 'slot__venue'  # CachedFacetChoicesFilter counts follow the venue filter
+    # Matched by StructuredSearchMixin.get_search_results
     search_fields = (
-        'user__username__icontains',
-        'user__email__icontains',
-        'slot__date__icontains',
+        'user__username',
+        'user__email',
+        'slot__date',
         'slot__time_slot',
     )
+    search_date_field = 'slot__date'
+    search_choice_fields = ('slot__time_slot', 'slot__cricket_type', 'status')
+    search_prefix_fields = ('user__username', 'user__email')
+    search_help_text = 'Search by slot date (2026-01-31, 01/2026, 2026), time slot, status or username/email prefix.'
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
+    # Search-backed widgets instead of a <select> with every user and slot
+    autocomplete_fields = ('user', 'slot')
     
     fieldsets = (
         ('Booking Information', {
-            'fields': ('user', 'slot', 'status'),
+            'fields': ('user', 'slot', 'players', 'status', 'expires_at'),
             'classes': ('wide',)
         }),
         ('Timestamps', {
@@ -291,21 +428,39 @@ class BookingAdmin(admin.ModelAdmin):
     
     actions = ['mark_confirmed', 'mark_cancelled', 'mark_pending', 'export_bookings']
     
+    def _set_status(self, request, queryset, status):
+        """Change bookings one at a time, skipping those that would double-book or overfill a slot"""
+        updated = 0
+        for booking_id in queryset.exclude(status=status).values_list('pk', flat=True):
+            try:
+                set_booking_status(booking_id, status)
+            except BookingError as exc:
+                self.message_user(request, f'Booking #{booking_id} skipped: {exc}', messages.WARNING)
+            else:
+                updated += 1
+        # Signals skip pending bookings, so a booking becoming a hold isn't covered by them
+        invalidate_availability()
+        invalidate_history()
+        return updated
+    
     def mark_confirmed(self, request, queryset):
         """Admin action to mark bookings as confirmed"""
-        updated = queryset.update(status='confirmed')
+        updated = self._set_status(request, queryset, 'confirmed')
         self.message_user(request, f'✅ {updated} booking(s) marked as confirmed.')
     mark_confirmed.short_description = "Mark selected as Confirmed"
     
     def mark_cancelled(self, request, queryset):
         """Admin action to mark bookings as cancelled"""
         updated = queryset.update(status='cancelled')
+        # update() skips the booking signals
+        invalidate_availability()
+        invalidate_history()
         self.message_user(request, f'❌ {updated} booking(s) marked as cancelled.')
     mark_cancelled.short_description = "Mark selected as Cancelled"
     
     def mark_pending(self, request, queryset):
-        """Admin action to mark bookings as pending"""
-        updated = queryset.update(status='pending')
+        """Admin action to mark bookings as pending (a hold that expires like any other)"""
+        updated = self._set_status(request, queryset, 'pending')
         self.message_user(request, f'⏳ {updated} booking(s) marked as pending.')
     mark_pending.short_description = "Mark selected as Pending"
     
@@ -329,6 +484,59 @@ class BookingAdmin(admin.ModelAdmin):
         return form
 
 
+# ==================== ARCHIVE ADMIN ====================
+class ReadOnlyArchiveAdmin(admin.ModelAdmin):
+    """
+    Archive rows are written only by the archive_bookings command
+    """
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedSlot)
+class ArchivedSlotAdmin(ReadOnlyArchiveAdmin):
+    list_display = ('id', 'venue', 'date', 'time_slot', 'cricket_type', 'price', 'max_players', 'archived_at')
+    list_filter = ('venue', ('date', DateRangeFieldListFilter), 'cricket_type', 'time_slot')
+    list_select_related = ('venue',)
+    ordering = ('-date', 'time_slot')
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(ReadOnlyArchiveAdmin):
+    list_display = ('id', 'user', 'slot', 'players', 'status', 'created_at', 'archived_at')
+    list_filter = ('status', ('slot__date', DateRangeFieldListFilter))
+    list_select_related = ('user', 'slot')
+    raw_id_fields = ('user', 'slot')
+    ordering = ('-created_at',)
+
+
+# ==================== OUTBOX ADMIN ====================
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """
+    Queued booking notifications, delivered by run_outbox_worker
+    """
+    list_display = ('id', 'event', 'recipient', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'event')
+    search_fields = ('recipient',)
+    raw_id_fields = ('booking',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    ordering = ('-created_at',)
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        """Make failed or waiting messages due immediately"""
+        updated = queryset.exclude(status='sent').update(
+            status='pending', next_attempt_at=timezone.now(), locked_until=None
+        )
+        self.message_user(request, f'🔁 {updated} message(s) queued for immediate delivery.')
+    retry_now.short_description = "Retry selected messages now"
+
+
 # ==================== GLOBAL ADMIN CUSTOMIZATION ====================
 
 # List per page
@@ -11,3 +11,7 @@ class SlotsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'slots'
     verbose_name = 'Cricket Slot Booking'
+    
+    def ready(self):
+        """Connect signal handlers"""
+        from . import signals  # noqa: F401
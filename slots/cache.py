@@ -0,0 +1,102 @@
+"""
+Cache helpers for Cricket Slot Booking System
+Availability data is cached under version keys so that one write can
+invalidate every cached listing at once. Each venue has its own version,
+so a booking at one ground leaves the other grounds' listings cached; a
+global version covers changes that aren't tied to one venue.
+
+Reports over past dates change far less often than availability, so they
+have their own history version, bumped only when slots are edited,
+imported or archived, or a booking on a past slot changes. Reports that
+reach today or later are cached briefly instead of being tied to any
+version, so booking traffic doesn't keep flushing them.
+"""
+import time
+
+from django.core.cache import cache
+
+from . import metrics
+
+
+AVAILABILITY_VERSION_KEY = 'slots:availability-version'
+VENUE_VERSION_KEY = 'slots:availability-version:venue:{}'
+HISTORY_VERSION_KEY = 'slots:history-version'
+AVAILABILITY_TIMEOUT = 300
+HISTORY_TIMEOUT = 86400
+RECENT_TIMEOUT = 60
+
+_MISSING = object()
+
+
+def availability_version(venue_id=None):
+    """
+    Current availability version, created on first use: the global one,
+    combined with the venue's when venue_id is given (one cache round trip)
+    """
+    keys = [AVAILABILITY_VERSION_KEY]
+    if venue_id is not None:
+        keys.append(VENUE_VERSION_KEY.format(venue_id))
+    return _versions(keys)
+
+
+def _versions(keys):
+    """The version stored under each key (created on first use), joined with dots"""
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            version = time.time_ns()
+            cache.add(key, version, None)
+            version = cache.get(key, version)
+        versions.append(str(version))
+    return '.'.join(versions)
+
+
+def availability_key(name, *parts, venue_id=None):
+    """Build a cache key that changes whenever availability is invalidated"""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'slots:availability:{availability_version(venue_id)}:{name}:{suffix}'
+
+
+def get_or_set_availability(name, parts, default, venue_id=None):
+    """
+    Return the cached value for (name, parts), computing it with default()
+    on a miss. Pass venue_id for data about one venue.
+    """
+    return _get_or_set(name, availability_key(name, *parts, venue_id=venue_id), default, AVAILABILITY_TIMEOUT)
+
+
+def get_or_set_history(name, parts, default):
+    """Like get_or_set_availability(), for data about past dates only"""
+    suffix = ':'.join(str(part) for part in parts)
+    key = f'slots:history:{_versions([HISTORY_VERSION_KEY])}:{name}:{suffix}'
+    return _get_or_set(name, key, default, HISTORY_TIMEOUT)
+
+
+def get_or_set_recent(name, parts, default):
+    """Cache for RECENT_TIMEOUT seconds, whatever changes in the meantime"""
+    suffix = ':'.join(str(part) for part in parts)
+    return _get_or_set(name, f'slots:recent:{name}:{suffix}', default, RECENT_TIMEOUT)
+
+
+def _get_or_set(name, key, default, timeout):
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        metrics.CACHE_REQUESTS.labels(name, 'hit').inc()
+        return value
+    metrics.CACHE_REQUESTS.labels(name, 'miss').inc()
+    value = default()
+    cache.add(key, value, timeout)
+    return value
+
+
+def invalidate_availability(venue_id=None):
+    """Invalidate cached availability of one venue, or of every venue"""
+    key = AVAILABILITY_VERSION_KEY if venue_id is None else VENUE_VERSION_KEY.format(venue_id)
+    cache.set(key, time.time_ns(), None)
+
+
+def invalidate_history():
+    """Invalidate cached data about past dates (see get_or_set_history)"""
+    cache.set(HISTORY_VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,126 @@
+"""
+iCalendar feed of a user's bookings for Cricket Slot Booking System
+
+Each user gets a feed URL carrying a signed token instead of a session, so
+calendar apps can subscribe to it. The feed lists upcoming confirmed
+bookings; its ETag and Last-Modified come from one aggregate over the
+user's bookings, so polling clients get a 304 for the price of that query.
+
+Slot labels are wall-clock times at the venue, so events start and end at
+floating local times (no UTC offset) with the calendar's zone named by
+VENUE_TIME_ZONE; converting them from TIME_ZONE would shift every event.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Booking
+
+
+TOKEN_SALT = 'slots.calendar'
+LINE_LIMIT = 75  # octets, RFC 5545 section 3.1
+
+
+def make_token(user):
+    """Signed token identifying user in their feed URL; rotating SECRET_KEY revokes all feeds"""
+    return signing.Signer(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def user_id_from_token(token):
+    """The user id in a feed token, or None if it was tampered with"""
+    try:
+        return int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def feed_state(user_id):
+    """(last change, booking count) for the user's bookings; the count catches deletions"""
+    state = Booking.objects.filter(user_id=user_id).aggregate(
+        last_modified=Max('updated_at'),
+        count=Count('id'),
+    )
+    return state['last_modified'], state['count']
+
+
+def slot_times(slot):
+    """Start and end of a slot as naive venue-local datetimes, from its time slot label"""
+    start_label, end_label = (part.strip() for part in slot.get_time_slot_display().split('-'))
+    start = datetime.combine(slot.date, datetime.strptime(start_label, '%I:%M %p').time())
+    end = datetime.combine(slot.date, datetime.strptime(end_label, '%I:%M %p').time())
+    if end <= start:
+        end += timedelta(days=1)  # runs past midnight
+    return start, end
+
+
+def escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Split a content line into CRLF-terminated chunks of at most 75 octets"""
+    encoded = line.encode('utf-8')
+    chunks = []
+    while len(encoded) > LINE_LIMIT:
+        cut = LINE_LIMIT if not chunks else LINE_LIMIT - 1  # continuation lines start with a space
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1  # don't split a UTF-8 sequence
+        chunks.append(encoded[:cut])
+        encoded = encoded[cut:]
+    chunks.append(encoded)
+    return (b'\r\n '.join(chunks) + b'\r\n').decode('utf-8')
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def format_local(value):
+    """A floating date-time: the same wall-clock time in every zone"""
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def venue_today():
+    return timezone.localdate(timezone=ZoneInfo(settings.VENUE_TIME_ZONE))
+
+
+def upcoming_bookings(user_id):
+    return (
+        Booking.objects
+        .filter(user_id=user_id, status='confirmed', slot__date__gte=venue_today())
+        .select_related('slot__venue')
+        .order_by('slot__date', 'slot__time_slot')
+    )
+
+
+def iter_feed(user_id, host='cricket-slots'):
+    """Yield the feed one folded line at a time, reading bookings with iterator()"""
+    yield fold('BEGIN:VCALENDAR')
+    yield fold('VERSION:2.0')
+    yield fold('PRODID:-//Cricket Slot Booking//Bookings//EN')
+    yield fold('CALSCALE:GREGORIAN')
+    yield fold('METHOD:PUBLISH')
+    yield fold('X-WR-CALNAME:Cricket bookings')
+    yield fold(f'X-WR-TIMEZONE:{settings.VENUE_TIME_ZONE}')
+    for booking in upcoming_bookings(user_id).iterator(chunk_size=200):
+        slot = booking.slot
+        start, end = slot_times(slot)
+        players = f"{booking.players} player{'s' if booking.players != 1 else ''}"
+        yield fold('BEGIN:VEVENT')
+        yield fold(f'UID:booking-{booking.pk}@{host}')
+        yield fold(f'DTSTAMP:{format_utc(booking.updated_at)}')
+        yield fold(f'LAST-MODIFIED:{format_utc(booking.updated_at)}')
+        yield fold(f'DTSTART:{format_local(start)}')
+        yield fold(f'DTEND:{format_local(end)}')
+        yield fold(f'SUMMARY:{escape(f"{slot.get_cricket_type_display()} ({players})")}')
+        yield fold(f'DESCRIPTION:{escape(f"{slot.get_time_slot_display()} on {slot.date:%d %b %Y}, {players}")}')
+        yield fold(f'LOCATION:{escape(slot.venue.name)}')
+        yield fold('STATUS:CONFIRMED')
+        yield fold('END:VEVENT')
+    yield fold('END:VCALENDAR')
@@ -0,0 +1,92 @@
+"""
+View decorators for Cricket Slot Booking System
+"""
+from functools import wraps
+
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from . import idempotency
+
+
+def cache_public(max_age=60, stale_while_revalidate=300):
+    """
+    Let browsers and shared caches keep anonymous responses for max_age
+    seconds and serve them stale while revalidating in the background.
+    Responses for logged-in users stay private. The Vary: Cookie header
+    keeps the two apart; slots.middleware.CachePolicyMiddleware downgrades
+    the response to private if a cookie ends up being set on it.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            # A 304 refreshes a shared cache's stored headers, so it keeps the 200's policy
+            if request.user.is_authenticated or response.status_code not in (200, 304):
+                patch_cache_control(response, private=True, no_cache=True, max_age=0)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=max_age,
+                    stale_while_revalidate=stale_while_revalidate,
+                )
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return _wrapped_view
+    return decorator
+
+
+def cache_private_no_store(view_func):
+    """Personal pages: never stored by any cache, browser or shared"""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_store=True, max_age=0)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return _wrapped_view
+
+
+def idempotent(view_func):
+    """
+    Run a POST at most once per idempotency key (see slots.idempotency).
+    A replayed key gets the first request's redirect and messages back, or
+    a 409 while the first request is still running; requests without a key
+    run as usual.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        key = idempotency.request_key(request) if request.method == 'POST' else None
+        if key is None:
+            return view_func(request, *args, **kwargs)
+        
+        outcome = idempotency.lookup(key)
+        if outcome is not None:
+            return idempotency.replay(request, outcome)
+        
+        if not idempotency.acquire(key):
+            # The same submission is still running in this process
+            return HttpResponse('This request is already being processed.', status=409)
+        
+        try:
+            mark = idempotency.message_mark(request)
+            with transaction.atomic():
+                # Blocks while another process runs the same key, until it commits
+                if not idempotency.claim(key, request):
+                    outcome = idempotency.lookup(key)
+                    if outcome is None:
+                        return HttpResponse('This request is already being processed.', status=409)
+                    return idempotency.replay(request, outcome)
+                response = view_func(request, *args, **kwargs)
+                if response.status_code in (301, 302, 303, 307, 308):
+                    outcome = idempotency.record(key, response, idempotency.flashed_messages(request, mark))
+                else:
+                    idempotency.unclaim(key)
+            if outcome is not None:
+                idempotency.remember(key, outcome)
+            return response
+        finally:
+            idempotency.release(key)
+    return _wrapped_view
@@ -0,0 +1,140 @@
+"""
+Admin list filters for Cricket Slot Booking System
+Bounded filters that never scan a whole table to build their choices
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+
+
+def _hidden_params(changelist, exclude):
+    """Current changelist query parameters, minus the ones a filter form submits"""
+    return {key: value for key, value in changelist.params.items() if key not in exclude}
+
+
+class DateRangeFieldListFilter(admin.FieldListFilter):
+    """
+    Filter a date field with "from" / "to" inputs.
+    Replaces DateFieldListFilter and per-value filters that list every
+    distinct date in the table.
+    """
+    template = 'admin/slots/date_range_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg_gte = f'{field_path}__gte'
+        self.lookup_kwarg_lte = f'{field_path}__lte'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.value_gte = parse_date(self.used_parameters.get(self.lookup_kwarg_gte) or '')
+        self.value_lte = parse_date(self.used_parameters.get(self.lookup_kwarg_lte) or '')
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg_gte, self.lookup_kwarg_lte]
+
+    def queryset(self, request, queryset):
+        """Apply only well-formed dates so a typo doesn't break the changelist"""
+        if self.value_gte:
+            queryset = queryset.filter(**{self.lookup_kwarg_gte: self.value_gte})
+        if self.value_lte:
+            queryset = queryset.filter(**{self.lookup_kwarg_lte: self.value_lte})
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            'selected': bool(self.value_gte or self.value_lte),
+            'gte_param': self.lookup_kwarg_gte,
+            'lte_param': self.lookup_kwarg_lte,
+            'gte_value': self.value_gte.isoformat() if self.value_gte else '',
+            'lte_value': self.value_lte.isoformat() if self.value_lte else '',
+            'hidden_params': _hidden_params(changelist, self.expected_parameters()),
+            'reset_query_string': changelist.get_query_string(remove=self.expected_parameters()),
+        }
+
+
+class CachedFacetChoicesFilter(admin.ChoicesFieldListFilter):
+    """
+    Choices filter that shows how many rows carry each value.
+    Counts come from a single GROUP BY and are cached for
+    ADMIN_FACET_CACHE_TIMEOUT seconds. They cover the whole table, or the
+    venue picked in the changelist's venue filter when the model admin
+    names its path in `facet_venue_path`; other filters don't narrow them.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.model = model
+        venue_path = getattr(model_admin, 'facet_venue_path', None)
+        self.venue_filter = {}
+        if venue_path:
+            venue_id = request.GET.get(f'{venue_path}__id__exact', '')
+            if venue_id.isdigit():
+                self.venue_filter = {f'{venue_path}__id': int(venue_id)}
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+    def facet_counts(self):
+        """Return {value: row count}, cached per model, field path and venue"""
+        venue_id = next(iter(self.venue_filter.values()), 'all')
+        cache_key = f'admin-facets:{self.model._meta.label_lower}:{self.field_path}:{venue_id}'
+        counts = cache.get(cache_key)
+        if counts is None:
+            counts = dict(
+                self.model._default_manager
+                .filter(**self.venue_filter)
+                .values_list(self.field_path)
+                .annotate(total=Count('pk'))
+                .order_by()
+            )
+            cache.set(cache_key, counts, getattr(settings, 'ADMIN_FACET_CACHE_TIMEOUT', 300))
+        return counts
+
+    def choices(self, changelist):
+        counts = self.facet_counts()
+        choices = super().choices(changelist)
+        all_choice = next(choices)
+        all_choice['display'] = f"{all_choice['display']} ({sum(counts.values())})"
+        yield all_choice
+        lookups = [lookup for lookup, title in self.field.flatchoices if lookup is not None]
+        for lookup, choice in zip(lookups, choices):
+            choice['display'] = f"{choice['display']} ({counts.get(lookup, 0)})"
+            yield choice
+        yield from choices
+
+
+class UserAutocompleteFilter(admin.SimpleListFilter):
+    """
+    Filter bookings by exact username.
+    The input suggests usernames through the admin autocomplete endpoint
+    (which pages results) instead of rendering every user as a choice.
+    """
+    title = 'user'
+    parameter_name = 'username'
+    template = 'admin/slots/autocomplete_filter.html'
+    # (app_label, model_name, field_name) of a ForeignKey listed in the
+    # model admin's autocomplete_fields
+    autocomplete_source = ('slots', 'booking', 'user')
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(user__username=self.value())
+        return queryset
+
+    def choices(self, changelist):
+        app_label, model_name, field_name = self.autocomplete_source
+        yield {
+            'selected': bool(self.value()),
+            'parameter_name': self.parameter_name,
+            'value': self.value() or '',
+            'autocomplete_url': reverse('admin:autocomplete'),
+            'app_label': app_label,
+            'model_name': model_name,
+            'field_name': field_name,
+            'hidden_params': _hidden_params(changelist, self.expected_parameters()),
+            'reset_query_string': changelist.get_query_string(remove=self.expected_parameters()),
+        }
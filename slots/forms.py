@@ -1,10 +1,29 @@
 """
 Forms for Cricket Slot Booking System
 """
+import re
+
 from django import forms
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from .models import Slot, Booking
+from django.core.validators import MaxValueValidator
+from django.db import IntegrityError, transaction
+from .models import Slot, Booking, Venue
+from .reports import GROUP_CHOICES
+
+
+# Created by migration 0003
+EMAIL_UNIQUE_INDEX = 'slots_auth_user_email_ci_uniq'
+
+
+def violated_constraint(exc):
+    """Name of the unique index or constraint an IntegrityError came from, or None"""
+    diag = getattr(exc.__cause__, 'diag', None)  # psycopg2 and psycopg 3
+    if getattr(diag, 'constraint_name', None):
+        return diag.constraint_name
+    # SQLite only names it in the message: "UNIQUE constraint failed: index 'name'"
+    match = re.search(r"index '([^']+)'", str(exc))
+    return match.group(1) if match else None
 
 
 class RegisterForm(forms.Form):
@@ -45,20 +64,6 @@ class RegisterForm(forms.Form):
         })
     )
     
-    def clean_username(self):
-        """Validate username is unique"""
-        username = self.cleaned_data.get('username')
-        if User.objects.filter(username=username).exists():
-            raise ValidationError('This username is already taken.')
-        return username
-    
-    def clean_email(self):
-        """Validate email is unique"""
-        email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
-            raise ValidationError('This email is already registered.')
-        return email
-    
     def clean(self):
         """Validate passwords match"""
         cleaned_data = super().clean()
@@ -70,18 +75,199 @@ class RegisterForm(forms.Form):
                 raise ValidationError('Passwords do not match.')
         
         return cleaned_data
+    
+    def save(self):
+        """
+        Create the user with a single INSERT.
+        
+        Uniqueness of username and email (case-insensitive) is enforced by
+        unique indexes on auth_user; a violation is mapped back to a field
+        error and None is returned.
+        """
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(
+                    username=self.cleaned_data['username'],
+                    email=self.cleaned_data['email'],
+                    password=self.cleaned_data['password1']
+                )
+        except IntegrityError as exc:
+            # The index that fired identifies which column collided
+            if violated_constraint(exc) == EMAIL_UNIQUE_INDEX:
+                self.add_error('email', 'This email is already registered.')
+            else:
+                self.add_error('username', 'This username is already taken.')
+            return None
 
 
 class BookingForm(forms.ModelForm):
     """
-    Slot Booking Form
+    Slot Booking Form - the captain picks how many players to book for
     """
     class Meta:
         model = Booking
-        fields = []  # No fields needed - user and slot are pre-selected
+        fields = ['players']  # user and slot are pre-selected
+        labels = {'players': 'Number of players'}
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, slot=None, **kwargs):
         super().__init__(*args, **kwargs)
         # Custom styling if needed
         for field in self.fields.values():
             field.widget.attrs.update({'class': 'form-control'})
+        players = self.fields['players']
+        players.widget.attrs['min'] = 1
+        if slot is not None:
+            # Early feedback only; capacity is re-checked with the slot locked.
+            # Spots in the user's own hold are free for them.
+            held = self.instance.players if self.instance.status == 'pending' and self.instance.pk else 0
+            max_players = max(slot.spots_left + held, 1)
+            players.widget.attrs['max'] = max_players
+            players.validators.append(MaxValueValidator(max_players))
+
+
+class SlotChoiceField(forms.ModelChoiceField):
+    """Slot picker labelled with date, time and free spots (needs with_booked_count)"""
+    def label_from_instance(self, slot):
+        return f"{slot.date:%a %d %b %Y} · {slot.get_time_slot_display()} ({slot.spots_left} spots left)"
+
+
+class RescheduleForm(forms.Form):
+    """
+    Pick the slot to move a booking to
+    """
+    slot = SlotChoiceField(
+        queryset=Slot.objects.none(),
+        label='New slot',
+        empty_label='Choose a slot',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    
+    def __init__(self, *args, slots=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if slots is not None:
+            # Early feedback only; capacity is re-checked with both slots locked
+            self.fields['slot'].queryset = slots
+
+
+class CloseDatesForm(forms.Form):
+    """
+    Admin form for closing every slot between two dates
+    """
+    start_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    
+    def clean(self):
+        """Validate the date range"""
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        
+        if start_date and end_date and start_date > end_date:
+            raise ValidationError('Start date must be on or before end date.')
+        
+        return cleaned_data
+
+
+class SlotImportForm(forms.Form):
+    """
+    Admin form for importing slots from a CSV file (see slots.importers)
+    """
+    venue = forms.ModelChoiceField(
+        queryset=Venue.objects.order_by('pk'),
+        empty_label=None,
+        help_text="Venue the imported slots are at"
+    )
+    file = forms.FileField(help_text="CSV with date, time_slot, cricket_type and optional price, max_players, is_closed columns")
+    update_existing = forms.BooleanField(
+        required=False,
+        initial=True,
+        help_text="Update price/capacity/closed of slots that already exist"
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        help_text="Validate and report without saving anything. Without it, rows with errors are skipped; "
+                  "a file that can't be read to the end (e.g. not UTF-8) saves nothing"
+    )
+
+
+class ReportForm(forms.Form):
+    """
+    Admin form for the occupancy and revenue report (see slots.reports)
+    """
+    start_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    group_by = forms.ChoiceField(choices=GROUP_CHOICES, initial='day')
+    venue = forms.ModelChoiceField(
+        queryset=Venue.objects.order_by('pk'),
+        required=False,
+        empty_label='All venues',
+        to_field_name='slug'
+    )
+    
+    def clean(self):
+        """Validate the date range"""
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        
+        if start_date and end_date and start_date > end_date:
+            raise ValidationError('Start date must be on or before end date.')
+        
+        return cleaned_data
+
+
+class SlotSearchForm(forms.Form):
+    """
+    Dashboard slot search - every field is optional and maps to an
+    indexed filter on Slot
+    """
+    date = forms.ChoiceField(
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    date_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    date_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    cricket_type = forms.ChoiceField(
+        required=False,
+        choices=[('', 'Any type')] + Slot.CRICKET_TYPE_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    time_band = forms.ChoiceField(
+        required=False,
+        choices=[('', 'Any time')] + Slot.TIME_BAND_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    min_spots = forms.IntegerField(
+        required=False,
+        min_value=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Min. free spots'})
+    )
+    
+    def __init__(self, *args, available_dates=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['date'].choices = [('', 'Any date')] + [
+            (day.isoformat(), day.strftime('%d %b %Y')) for day in available_dates
+        ]
+    
+    def filter(self, queryset):
+        """Apply the cleaned filters to a Slot queryset (annotated with with_booked_count)"""
+        data = self.cleaned_data
+        if data.get('date'):
+            queryset = queryset.filter(date=data['date'])
+        if data.get('date_from'):
+            queryset = queryset.filter(date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(date__lte=data['date_to'])
+        if data.get('cricket_type'):
+            queryset = queryset.filter(cricket_type=data['cricket_type'])
+        if data.get('time_band'):
+            queryset = queryset.filter(time_slot__in=Slot.TIME_BANDS[data['time_band']])
+        if data.get('min_spots'):
+            queryset = queryset.bookable(data['min_spots'])
+        return queryset
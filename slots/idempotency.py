@@ -0,0 +1,158 @@
+"""
+Idempotency keys for Cricket Slot Booking System
+
+Booking and cancel forms carry a one-off token ({% idempotency_field %}).
+The first POST with a token records its outcome (redirect target and the
+flash messages it added) in the cache and in IdempotencyRecord. A replay
+of the same submission - a double-click or a mobile retry - gets that
+outcome back from a single cache lookup without running the view again.
+
+The cache lock only spots retries handled by the same process. Across
+processes the IdempotencyRecord row is the lock: it is inserted before the
+view runs, in the view's transaction, so a concurrent request with the
+same key blocks on the unique index until the first one commits, then
+replays its outcome.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponseRedirect
+from django.utils import timezone
+
+from .models import IdempotencyRecord
+
+
+FIELD_NAME = 'idempotency_key'
+MAX_TOKEN_LENGTH = 64
+LOCK_TIMEOUT = 30
+
+
+def get_ttl():
+    return getattr(settings, 'IDEMPOTENCY_TTL', 86400)
+
+
+def request_key(request):
+    """
+    Storage key for a POST's token, scoped to the user and path so a token
+    can't replay someone else's request. None if the request has no token.
+    """
+    token = request.POST.get(FIELD_NAME, '')
+    if not token or len(token) > MAX_TOKEN_LENGTH or not request.user.is_authenticated:
+        return None
+    raw = f'{request.user.pk}:{request.path}:{token}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _cache_key(key):
+    return f'slots:idempotency:{key}'
+
+
+def lookup(key):
+    """Stored outcome for a key as a dict, or None"""
+    outcome = cache.get(_cache_key(key))
+    if outcome is not None:
+        return outcome
+    # Cache miss (evicted, or another cache node): fall back to the table
+    record = (
+        IdempotencyRecord.objects
+        .filter(key=key, expires_at__gt=timezone.now(), status_code__gt=0)
+        .first()
+    )
+    if record is None:
+        return None
+    outcome = {
+        'status_code': record.status_code,
+        'location': record.location,
+        'messages': record.messages,
+    }
+    cache.set(_cache_key(key), outcome, get_ttl())
+    return outcome
+
+
+def acquire(key):
+    """Mark a key as in flight in this cache; False if another request already holds it"""
+    return cache.add(_cache_key(key) + ':lock', 1, LOCK_TIMEOUT)
+
+
+def release(key):
+    cache.delete(_cache_key(key) + ':lock')
+
+
+def claim(key, request):
+    """
+    Insert the key's record, without an outcome yet (call inside the view's
+    transaction). Returns False if another request already recorded it;
+    an expired record that hasn't been purged yet is replaced.
+    """
+    now = timezone.now()
+    IdempotencyRecord.objects.filter(key=key, expires_at__lte=now).delete()
+    try:
+        # Savepoint, so a duplicate leaves the outer transaction usable
+        with transaction.atomic():
+            IdempotencyRecord.objects.create(
+                key=key,
+                user=request.user,
+                path=request.path[:255],
+                status_code=0,
+                expires_at=now + timedelta(seconds=get_ttl()),
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def unclaim(key):
+    """Drop a claimed record when the response isn't a redirect worth replaying"""
+    IdempotencyRecord.objects.filter(key=key, status_code=0).delete()
+
+
+def _message_pairs(request):
+    """[level, message] of every message on the request, without consuming them"""
+    storage = messages.get_messages(request)
+    used = storage.used
+    try:
+        return [[message.level, str(message.message)] for message in storage]
+    finally:
+        storage.used = used
+
+
+def message_mark(request):
+    """Number of messages on the request so far, for flashed_messages()"""
+    return len(_message_pairs(request))
+
+
+def flashed_messages(request, start=0):
+    """[level, message] pairs added to the request since message_mark()"""
+    return _message_pairs(request)[start:]
+
+
+def record(key, response, flashed):
+    """
+    Save a redirect outcome to the claimed record (call inside the view's
+    transaction, so it commits together with the booking change) and
+    return it as a dict for the cache.
+    """
+    outcome = {
+        'status_code': response.status_code,
+        'location': response['Location'],
+        'messages': flashed,
+    }
+    IdempotencyRecord.objects.filter(key=key).update(**outcome)
+    return outcome
+
+
+def remember(key, outcome):
+    cache.set(_cache_key(key), outcome, get_ttl())
+
+
+def replay(request, outcome):
+    """Rebuild the first response: same flash messages, same redirect"""
+    for level, message in outcome['messages']:
+        messages.add_message(request, level, message)
+    response = HttpResponseRedirect(outcome['location'])
+    response.status_code = outcome['status_code']
+    return response
@@ -0,0 +1,117 @@
+"""
+Responsive image variants for Cricket Slot Booking System
+
+`manage.py build_responsive_images` writes resized WebP and original-format
+copies of every image under images/ into RESPONSIVE_IMAGE_ROOT, plus a
+manifest that the {% responsive_image %} template tag reads to build
+<picture>/srcset markup.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image
+
+
+MANIFEST_NAME = 'manifest.json'
+SOURCE_EXTENSIONS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG'}
+
+_manifest_cache = {'mtime': None, 'data': {}}
+
+
+def get_root():
+    """Directory the variants and manifest are written to"""
+    return Path(settings.RESPONSIVE_IMAGE_ROOT)
+
+
+def get_widths():
+    return sorted(getattr(settings, 'RESPONSIVE_IMAGE_WIDTHS', (320, 640, 1024, 1536)))
+
+
+def file_hash(path):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_source_images(static_dir):
+    """
+    Yield (static path, absolute path) for each source image under
+    static_dir/images, skipping the generated variants directory.
+    """
+    static_dir = Path(static_dir)
+    root = get_root().resolve()
+    for path in sorted((static_dir / 'images').rglob('*')):
+        if path.suffix.lower() not in SOURCE_EXTENSIONS:
+            continue
+        if root in path.resolve().parents:
+            continue
+        yield path.relative_to(static_dir).as_posix(), str(path)
+
+
+def build_variants(name, source_path, root, widths, content_hash):
+    """
+    Write resized variants of one image; returns its manifest entry.
+    Runs in a worker process, so it only takes picklable arguments.
+    """
+    root = Path(root)
+    stem, ext = os.path.splitext(name)
+    stem = stem.removeprefix('images/')
+    fallback_format = SOURCE_EXTENSIONS[ext.lower()]
+    entry = {'hash': content_hash, 'variants': {'webp': [], 'fallback': []}}
+
+    with Image.open(source_path) as image:
+        image.load()
+        entry['width'], entry['height'] = image.size
+        # Never upscale; always include the original width
+        targets = [width for width in widths if width < image.width] + [image.width]
+        for width in targets:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for kind, image_format, suffix in (
+                ('webp', 'WEBP', '.webp'),
+                ('fallback', fallback_format, ext.lower()),
+            ):
+                variant_name = f'{stem}-{width}w{suffix}'
+                output = root / variant_name
+                output.parent.mkdir(parents=True, exist_ok=True)
+                if image_format == 'JPEG' and resized.mode not in ('RGB', 'L'):
+                    resized = resized.convert('RGB')
+                resized.save(output, image_format, quality=80, optimize=True)
+                entry['variants'][kind].append({'width': width, 'path': variant_name})
+    return name, entry
+
+
+def variants_exist(entry, root):
+    root = Path(root)
+    return all(
+        (root / variant['path']).exists()
+        for variants in entry['variants'].values()
+        for variant in variants
+    )
+
+
+def read_manifest():
+    """Load the manifest, re-reading it only when the file changes"""
+    path = get_root() / MANIFEST_NAME
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return {}
+    if _manifest_cache['mtime'] != mtime:
+        with open(path, encoding='utf-8') as handle:
+            _manifest_cache['data'] = json.load(handle)
+        _manifest_cache['mtime'] = mtime
+    return _manifest_cache['data']
+
+
+def write_manifest(manifest):
+    root = get_root()
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / MANIFEST_NAME, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
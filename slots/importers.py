@@ -0,0 +1,233 @@
+"""
+CSV slot import for Cricket Slot Booking System
+
+Used by the admin "Import CSV" page and `manage.py import_slots`. A file
+holds the schedule of one venue. Rows are read from the file one at a time
+and written in batches: each batch looks up the venue's existing
+(date, time_slot, cricket_type) keys with one query, then
+bulk_creates the new slots and bulk_updates the changed ones. Memory use
+is bounded by the batch size, not the file size. All batches run in one
+transaction: rows with errors are skipped and reported, but a file that
+can't be read to the end saves nothing.
+
+Columns (header row required, order doesn't matter):
+    date, time_slot, cricket_type     required
+    price, max_players, is_closed     optional
+Choice columns accept the key ('6-7pm', 'box') or the label
+('6:00 PM - 7:00 PM', 'Box Cricket'); dates accept 2026-01-31 or 31/01/2026.
+"""
+import csv
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_availability, invalidate_history
+from .models import Slot, Venue
+from .search import parse_date_term
+
+
+REQUIRED_COLUMNS = ('date', 'time_slot', 'cricket_type')
+OPTIONAL_COLUMNS = ('price', 'max_players', 'is_closed')
+DEFAULT_MAX_PLAYERS = {'box': 6, 'normal': 11}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'closed'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n', 'open'}
+MAX_PRICE = Decimal('999.99')  # Slot.price has max_digits=5
+MAX_UPDATE_GROUPS = 50
+
+
+def _choice_lookup(choices):
+    """Map lowercased keys and labels to keys"""
+    lookup = {}
+    for key, label in choices:
+        lookup[key.lower()] = key
+        lookup[label.lower()] = key
+    return lookup
+
+
+TIME_SLOTS = _choice_lookup(Slot.TIME_SLOT_CHOICES)
+CRICKET_TYPES = _choice_lookup(Slot.CRICKET_TYPE_CHOICES)
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)  # (line number, message), capped
+    dry_run: bool = False
+
+    @property
+    def rows(self):
+        return self.created + self.updated + self.unchanged + self.error_count
+
+
+def parse_row(row, columns):
+    """Validate one CSV row; returns a dict of Slot field values"""
+    values = {}
+    date_range = parse_date_term((row.get('date') or '').strip())
+    if not date_range or date_range[0] != date_range[1]:
+        raise RowError(f"invalid date {row.get('date')!r}")
+    values['date'] = date_range[0]
+
+    time_slot = TIME_SLOTS.get((row.get('time_slot') or '').strip().lower())
+    if time_slot is None:
+        raise RowError(f"unknown time_slot {row.get('time_slot')!r}")
+    values['time_slot'] = time_slot
+
+    cricket_type = CRICKET_TYPES.get((row.get('cricket_type') or '').strip().lower())
+    if cricket_type is None:
+        raise RowError(f"unknown cricket_type {row.get('cricket_type')!r}")
+    values['cricket_type'] = cricket_type
+
+    if 'price' in columns and (row.get('price') or '').strip():
+        try:
+            price = Decimal(row['price'].strip())
+        except InvalidOperation:
+            raise RowError(f"invalid price {row['price']!r}")
+        if not Decimal(0) <= price <= MAX_PRICE:
+            raise RowError(f'price must be between 0 and {MAX_PRICE}')
+        values['price'] = price.quantize(Decimal('0.01'))
+
+    if 'max_players' in columns and (row.get('max_players') or '').strip():
+        try:
+            max_players = int(row['max_players'].strip())
+        except ValueError:
+            raise RowError(f"invalid max_players {row['max_players']!r}")
+        if max_players < 1:
+            raise RowError('max_players must be at least 1')
+        values['max_players'] = max_players
+
+    if 'is_closed' in columns:
+        flag = (row.get('is_closed') or '').strip().lower()
+        if flag in TRUE_VALUES:
+            values['is_closed'] = True
+        elif flag in FALSE_VALUES:
+            values['is_closed'] = False
+        else:
+            raise RowError(f"invalid is_closed {row['is_closed']!r}")
+    return values
+
+
+def import_slots(stream, venue=None, batch_size=1000, update_existing=True, dry_run=False, max_errors=1000):
+    """
+    Import slots at venue (default: Venue.get_default()) from a text stream
+    of CSV; returns an ImportResult.
+    The whole file is imported in one transaction: a file that can't be
+    read to the end (e.g. it isn't UTF-8) raises ValueError and saves
+    nothing. With dry_run everything is validated and written, then
+    rolled back. At most max_errors row errors are kept (None keeps all).
+    """
+    venue = venue or Venue.get_default()
+    result = ImportResult(dry_run=dry_run)
+    reader = csv.DictReader(stream)
+    try:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or ()]
+    except csv.Error as exc:
+        raise ValueError(f'malformed CSV header: {exc}')
+    columns = set(reader.fieldnames)
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+
+    def add_error(line, message):
+        result.error_count += 1
+        if max_errors is None or len(result.errors) < max_errors:
+            result.errors.append((line, message))
+
+    with transaction.atomic():
+        batch = {}
+        rows = iter(reader)
+        while True:
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            except csv.Error as exc:
+                # e.g. an unterminated quote swallowing the rest of the file;
+                # the bad record starts after the last line read
+                add_error(reader.line_num + 1, f'malformed CSV: {exc}')
+                continue
+            line = reader.line_num
+            try:
+                values = parse_row(row, columns)
+            except RowError as exc:
+                add_error(line, str(exc))
+                continue
+            key = (values['date'], values['time_slot'], values['cricket_type'])
+            if key in batch:
+                add_error(line, f'duplicate of line {batch[key][0]}')
+                continue
+            batch[key] = (line, values)
+            if len(batch) >= batch_size:
+                _write_batch(venue, batch, result, update_existing)
+                batch = {}
+        if batch:
+            _write_batch(venue, batch, result, update_existing)
+        if dry_run:
+            transaction.set_rollback(True)
+
+    if not dry_run and (result.created or result.updated):
+        # bulk_create/bulk_update don't send post_save
+        invalidate_availability(venue.pk)
+        invalidate_history()
+    return result
+
+
+def _write_batch(venue, batch, result, update_existing):
+    """Create or update one batch of parsed rows"""
+    dates = {key[0] for key in batch}
+    existing = {
+        (slot.date, slot.time_slot, slot.cricket_type): slot
+        for slot in Slot.objects.filter(venue=venue, date__in=dates)
+    }
+    to_create = []
+    # New values -> ids of the slots that get them; schedules reuse a few
+    # prices and capacities, so this is usually a handful of UPDATEs
+    updates = {}
+
+    for key, (_, values) in batch.items():
+        slot = existing.get(key)
+        if slot is None:
+            values.setdefault('max_players', DEFAULT_MAX_PLAYERS[values['cricket_type']])
+            to_create.append(Slot(venue=venue, **values))
+            continue
+        changed = {
+            name: value for name, value in values.items()
+            if name in OPTIONAL_COLUMNS and getattr(slot, name) != value
+        }
+        if not changed or not update_existing:
+            result.unchanged += 1
+            continue
+        updates.setdefault(tuple(sorted(changed.items())), []).append(slot)
+
+    Slot.objects.bulk_create(to_create)
+    if len(updates) <= MAX_UPDATE_GROUPS:
+        now = timezone.now()
+        for changed, slots in updates.items():
+            Slot.objects.filter(pk__in=[slot.pk for slot in slots]).update(**dict(changed), updated_at=now)
+    else:
+        _bulk_update(updates)
+    result.created += len(to_create)
+    result.updated += sum(len(slots) for slots in updates.values())
+
+
+def _bulk_update(updates):
+    """One CASE-based bulk_update, for batches with too many distinct values"""
+    now = timezone.now()
+    fields = set()
+    to_update = []
+    for changed, slots in updates.items():
+        for slot in slots:
+            for name, value in changed:
+                setattr(slot, name, value)
+                fields.add(name)
+            slot.updated_at = now  # auto_now isn't applied by bulk_update
+            to_update.append(slot)
+    Slot.objects.bulk_update(to_update, [*sorted(fields), 'updated_at'])
@@ -0,0 +1,98 @@
+"""
+Management command to move past slots and their bookings into archive tables
+Usage: python manage.py archive_bookings --before=2026-01-01 [--batch-size 500] [--dry-run]
+
+Each batch is copied and deleted in its own transaction, so the command can
+be interrupted and re-run; it picks up where it stopped.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from slots.cache import invalidate_availability, invalidate_history
+from slots.models import ArchivedBooking, ArchivedSlot, Booking, OutboxMessage, Slot
+
+
+class Command(BaseCommand):
+    help = 'Moves slots dated before --before (and their bookings) into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            type=date.fromisoformat,
+            default=None,
+            help='Archive slots dated strictly before this day (YYYY-MM-DD, default: today)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of slots moved per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be archived',
+        )
+
+    def handle(self, *args, **options):
+        before = options['before'] or timezone.now().date()
+        if before > timezone.now().date():
+            raise CommandError('--before cannot be in the future.')
+
+        pending = Slot.objects.filter(date__lt=before)
+        if options['dry_run']:
+            self.stdout.write(
+                f'Would archive {pending.count()} slot(s) and '
+                f'{Booking.objects.filter(slot__date__lt=before).count()} booking(s) dated before {before}.'
+            )
+            return
+
+        slots_total = bookings_total = 0
+        while True:
+            slots_moved, bookings_moved = self.archive_batch(before, options['batch_size'])
+            if not slots_moved:
+                break
+            # The batch skipped the delete signals; reports read both tables
+            # and listings may still show the moved slots
+            invalidate_availability()
+            invalidate_history()
+            slots_total += slots_moved
+            bookings_total += bookings_moved
+            self.stdout.write(f'Archived {slots_moved} slot(s), {bookings_moved} booking(s)...')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Archived {slots_total} slot(s) and {bookings_total} booking(s) dated before {before}.'
+            )
+        )
+
+    @transaction.atomic
+    def archive_batch(self, before, batch_size):
+        """Copy one batch of slots and bookings to the archive and delete the originals"""
+        slots = list(
+            Slot.objects.select_for_update()
+            .filter(date__lt=before)
+            .order_by('id')[:batch_size]
+        )
+        if not slots:
+            return 0, 0
+        slot_ids = [slot.id for slot in slots]
+        bookings = list(Booking.objects.filter(slot_id__in=slot_ids))
+
+        ArchivedSlot.objects.bulk_create([ArchivedSlot.from_slot(slot) for slot in slots])
+        ArchivedBooking.objects.bulk_create(
+            [ArchivedBooking.from_booking(booking) for booking in bookings],
+            batch_size=1000,
+        )
+        # Raw deletes skip the per-row post_delete handlers (a slot lookup and
+        # cache writes per booking); handle() invalidates once per batch.
+        # They don't follow relations either, so unlink queued notifications first.
+        OutboxMessage.objects.filter(booking__slot_id__in=slot_ids).update(booking=None)
+        bookings_qs = Booking.objects.filter(slot_id__in=slot_ids)
+        bookings_qs._raw_delete(bookings_qs.db)
+        slots_qs = Slot.objects.filter(id__in=slot_ids)
+        slots_qs._raw_delete(slots_qs.db)
+        return len(slots), len(bookings)
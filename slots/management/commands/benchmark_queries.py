@@ -0,0 +1,73 @@
+"""
+Management command to count database queries per authenticated request
+Usage: python manage.py benchmark_queries [--requests 20] [--url /my-bookings/ ...]
+
+Runs each page under the plain database session engine and under the
+configured SESSION_ENGINE, inside a transaction that is rolled back.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+DB_SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+
+class Command(BaseCommand):
+    help = 'Compares queries per authenticated request across session engines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Number of requests per URL (default: 20)',
+        )
+        parser.add_argument(
+            '--url',
+            action='append',
+            dest='urls',
+            help='URL path to request (repeatable, defaults to the user pages)',
+        )
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or [
+            reverse('slots:my_dashboard'),
+            reverse('slots:my_bookings'),
+            reverse('slots:booking_history'),
+        ]
+        engines = [DB_SESSION_ENGINE]
+        if settings.SESSION_ENGINE != DB_SESSION_ENGINE:
+            engines.append(settings.SESSION_ENGINE)
+
+        with transaction.atomic():
+            user = User.objects.create_user(username='__benchmark_queries__')
+            results = {
+                engine: self._measure(engine, user, urls, options['requests'])
+                for engine in engines
+            }
+            transaction.set_rollback(True)
+
+        for url in urls:
+            self.stdout.write(f'\n{url}')
+            for engine in engines:
+                self.stdout.write(f'  {engine:<50} {results[engine][url]:6.2f} queries/request')
+
+    def _measure(self, engine, user, urls, requests):
+        """Return the average number of queries per request for each URL"""
+        averages = {}
+        with override_settings(SESSION_ENGINE=engine):
+            client = Client()
+            client.force_login(user)
+            for url in urls:
+                # Warm up caches before counting
+                client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(requests):
+                        client.get(url)
+                averages[url] = len(queries) / requests
+        return averages
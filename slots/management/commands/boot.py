@@ -0,0 +1,106 @@
+"""
+Management command to start the web process quickly
+Usage: python manage.py boot [--no-exec] [-- <extra gunicorn args>]
+
+Runs migrate only if there are unapplied migrations (under a PostgreSQL
+advisory lock, so instances starting together don't race) and
+collectstatic only if the static sources changed since the last run, then
+replaces itself with gunicorn (preload_app, see gunicorn.conf.py).
+"""
+import hashlib
+import os
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+WSGI_APPLICATION = 'cricket_project.wsgi:application'
+STATIC_HASH_FILE = '.static-source-hash'
+# Stable 32-bit key shared by every instance of this app
+MIGRATION_LOCK_KEY = zlib.crc32(b'cricket_project.boot.migrate')
+
+
+@contextmanager
+def advisory_lock(key):
+    """Hold a session-level advisory lock (PostgreSQL only; no-op elsewhere)"""
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s)', [key])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
+
+
+class Command(BaseCommand):
+    help = 'Migrates and collects static files only when needed, then execs gunicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-exec', action='store_true',
+                            help="Prepare the instance but don't start gunicorn")
+        parser.add_argument('gunicorn_args', nargs='*',
+                            help='Extra arguments passed to gunicorn (after --)')
+
+    def handle(self, *args, **options):
+        self.migrate_if_needed()
+        self.collectstatic_if_needed()
+        if options['no_exec']:
+            return
+
+        connections.close_all()
+        config = Path(settings.BASE_DIR) / 'gunicorn.conf.py'
+        argv = ['gunicorn', '--config', str(config), *options['gunicorn_args'], WSGI_APPLICATION]
+        self.stdout.write(f"Starting {' '.join(argv)}")
+        self.stdout.flush()
+        os.execvp(argv[0], argv)
+
+    def pending_migrations(self):
+        executor = MigrationExecutor(connection)
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+    def migrate_if_needed(self):
+        if not self.pending_migrations():
+            self.stdout.write('Migrations: up to date, skipping migrate.')
+            return
+        with advisory_lock(MIGRATION_LOCK_KEY):
+            # Another instance may have applied them while we waited
+            if self.pending_migrations():
+                call_command('migrate', interactive=False)
+            else:
+                self.stdout.write('Migrations: applied by another instance.')
+
+    def static_source_hash(self):
+        """Hash of every static source file's path and content"""
+        digest = hashlib.sha256()
+        files = []
+        for finder in finders.get_finders():
+            for path, storage in finder.list(['CVS', '.*', '*~']):
+                files.append((path, storage.path(path)))
+        for path, full_path in sorted(files):
+            digest.update(path.encode('utf-8'))
+            with open(full_path, 'rb') as handle:
+                for chunk in iter(lambda: handle.read(65536), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def collectstatic_if_needed(self):
+        static_root = Path(settings.STATIC_ROOT)
+        hash_file = static_root / STATIC_HASH_FILE
+        current = self.static_source_hash()
+        manifest_exists = (static_root / 'staticfiles.json').exists()
+        if manifest_exists and hash_file.exists() and hash_file.read_text().strip() == current:
+            self.stdout.write('Static files: unchanged, skipping collectstatic.')
+            return
+        call_command('collectstatic', interactive=False, verbosity=0)
+        hash_file.write_text(current)
+        self.stdout.write('Static files: collected.')
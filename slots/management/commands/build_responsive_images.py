@@ -0,0 +1,71 @@
+"""
+Management command to generate responsive WebP and resized image variants
+Usage: python manage.py build_responsive_images [--workers 4] [--force]
+
+Run before collectstatic so the variants are hashed and compressed with
+the rest of the static files.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from slots.images import (
+    build_variants,
+    file_hash,
+    find_source_images,
+    get_root,
+    get_widths,
+    read_manifest,
+    variants_exist,
+    write_manifest,
+)
+
+
+class Command(BaseCommand):
+    help = 'Generates responsive image variants and the manifest used by {% responsive_image %}'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (default: number of CPUs)')
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild variants even if the source image is unchanged')
+
+    def handle(self, *args, **options):
+        root = get_root()
+        widths = get_widths()
+        previous = read_manifest()
+        manifest = {}
+        jobs = []
+
+        for static_dir in settings.STATICFILES_DIRS:
+            for name, path in find_source_images(static_dir):
+                content_hash = file_hash(path)
+                entry = previous.get(name)
+                if (
+                    not options['force']
+                    and entry
+                    and entry['hash'] == content_hash
+                    and variants_exist(entry, root)
+                ):
+                    manifest[name] = entry
+                    self.stdout.write(f'Unchanged: {name}')
+                    continue
+                jobs.append((name, path, str(root), widths, content_hash))
+
+        if jobs:
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                futures = [pool.submit(build_variants, *job) for job in jobs]
+                for future in futures:
+                    name, entry = future.result()
+                    manifest[name] = entry
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Built {len(entry['variants']['webp'])} width(s): {name}")
+                    )
+
+        write_manifest(manifest)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ {len(jobs)} image(s) processed, {len(manifest) - len(jobs)} unchanged.'
+            )
+        )
@@ -1,11 +1,13 @@
 """
 Management command to create sample cricket slots for testing
 Usage: python manage.py create_sample_slots
+
+Slots are created at the default venue.
 """
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
-from slots.models import Slot
+from slots.models import Slot, Venue
 
 
 class Command(BaseCommand):
@@ -17,6 +19,7 @@ class Command(BaseCommand):
         # Clear existing slots (optional)
         # Slot.objects.all().delete()
         
+        venue = Venue.get_default() or Venue.objects.create()
         today = timezone.now().date()
         created_count = 0
         
@@ -33,6 +36,7 @@ class Command(BaseCommand):
                 for time_slot in time_slots:
                     try:
                         slot = Slot.objects.get_or_create(
+                            venue=venue,
                             date=slot_date,
                             time_slot=time_slot,
                             cricket_type=cricket_type,
@@ -0,0 +1,51 @@
+"""
+Management command to delete booking holds that were never confirmed
+Usage: python manage.py expire_holds [--batch-size 1000] [--dry-run]
+
+Expired holds already stop counting against capacity and are removed
+lazily whenever someone books the same slot; run this periodically (e.g.
+every few minutes from cron) to clear the rest.
+"""
+from django.core.management.base import BaseCommand
+
+from slots.models import Booking
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired pending booking holds in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of holds to delete per statement (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many holds have expired',
+        )
+
+    def handle(self, *args, **options):
+        """Delete expired holds using the (status, expires_at) index"""
+        batch_size = options['batch_size']
+
+        if options['dry_run']:
+            count = Booking.objects.expired_holds().count()
+            self.stdout.write(f'{count} expired hold(s) would be deleted.')
+            return
+
+        deleted_total = 0
+        while True:
+            ids = list(Booking.objects.expired_holds().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            # Re-check expiry so a hold confirmed since the SELECT is kept
+            deleted, _ = Booking.objects.expired_holds().filter(pk__in=ids).delete()
+            deleted_total += deleted
+            self.stdout.write(f'Deleted {deleted} expired hold(s)...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Released {deleted_total} expired hold(s).')
+        )
@@ -0,0 +1,96 @@
+"""
+Management command to import slots from a CSV file
+Usage: python manage.py import_slots schedule.csv [--venue slug] [--batch-size 1000] [--no-update] [--dry-run] [--errors errors.csv]
+
+Same importer as the admin "Import CSV" page (slots.importers); pass - to
+read from stdin. Slots go to the venue with the given slug, or to the
+default venue. Every row error is reported, not just the first ones.
+"""
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from slots.importers import import_slots
+from slots.models import Venue
+
+
+class Command(BaseCommand):
+    help = 'Creates or updates slots from a CSV file in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import, or - for stdin')
+        parser.add_argument(
+            '--venue',
+            help='Slug of the venue the slots are at (default: the first venue)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk_create/bulk_update batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--no-update',
+            action='store_true',
+            help='Leave slots that already exist unchanged',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and report without saving anything',
+        )
+        parser.add_argument(
+            '--errors',
+            help='Write row errors to this CSV file instead of the console',
+        )
+
+    def handle(self, *args, **options):
+        if options['venue']:
+            try:
+                options['venue'] = Venue.objects.get(slug=options['venue'])
+            except Venue.DoesNotExist:
+                raise CommandError(f"No venue with slug {options['venue']!r}")
+        start = time.perf_counter()
+        try:
+            if options['path'] == '-':
+                result = self._import(sys.stdin, options)
+            else:
+                with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                    result = self._import(stream, options)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ValueError as exc:
+            raise CommandError(f'Import failed: {exc}')
+        elapsed = time.perf_counter() - start
+
+        if result.errors:
+            if options['errors']:
+                with open(options['errors'], 'w', encoding='utf-8', newline='') as handle:
+                    writer = csv.writer(handle)
+                    writer.writerow(['line', 'error'])
+                    writer.writerows(result.errors)
+                self.stdout.write(f'Wrote {len(result.errors)} row error(s) to {options["errors"]}')
+            else:
+                for line, message in result.errors:
+                    self.stdout.write(self.style.ERROR(f'line {line}: {message}'))
+
+        prefix = 'Dry run (nothing saved):' if result.dry_run else '✅'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{prefix} {result.created} created, {result.updated} updated, '
+                f'{result.unchanged} unchanged, {result.error_count} error(s) '
+                f'from {result.rows} row(s) in {elapsed:.1f}s.'
+            )
+        )
+
+    def _import(self, stream, options):
+        return import_slots(
+            stream,
+            venue=options['venue'],
+            batch_size=options['batch_size'],
+            update_existing=not options['no_update'],
+            dry_run=options['dry_run'],
+            max_errors=None,
+        )
@@ -0,0 +1,93 @@
+"""
+Management command to profile a page locally
+Usage: python manage.py profile_url /admin/slots/slot/ [--user admin] [--repeat 5]
+       python manage.py profile_url --token
+
+Requests the path in-process with the test client (after one warm-up
+request) under the same profiler as ProfilingMiddleware, writes the
+.prof and .collapsed files to PROFILING_DIR and prints the top functions.
+--token prints a signed X-Profile-Token value for profiling a request
+on a deployed site instead.
+"""
+import io
+import pstats
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from slots import profiling
+
+
+class Command(BaseCommand):
+    help = 'Profiles GET requests to a path and writes pstats and flame graph files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='URL path to request, e.g. /admin/slots/slot/')
+        parser.add_argument(
+            '--user',
+            help='Username to log in as (required for admin and personal pages)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Number of profiled requests (default: 1)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=25,
+            help='Number of functions to print (default: 25)',
+        )
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='Host header to send; must be in ALLOWED_HOSTS (default: localhost)',
+        )
+        parser.add_argument(
+            '--token',
+            action='store_true',
+            help='Print a signed X-Profile-Token header value and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['token']:
+            max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+            self.stdout.write(f'{profiling.TOKEN_HEADER}: {profiling.make_token()}')
+            self.stdout.write(f'(valid for {max_age} seconds)')
+            return
+        path = options['path']
+        if not path:
+            raise CommandError('Pass a URL path to profile, or --token.')
+
+        client = Client(HTTP_HOST=options['host'])
+        if options['user']:
+            try:
+                client.force_login(User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        # Warm up imports, template loading and caches
+        response = client.get(path)
+        if response.status_code >= 400:
+            raise CommandError(f'GET {path} returned {response.status_code}.')
+
+        with profiling.Profile() as profile:
+            for _ in range(options['repeat']):
+                client.get(path)
+        prof_path = profile.save(path)
+
+        report = io.StringIO()
+        stats = pstats.Stats(str(prof_path), stream=report)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(options['limit'])
+        self.stdout.write(report.getvalue())
+
+        per_request = profile.duration * 1000 / options['repeat']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ {options["repeat"]} request(s), {per_request:.1f} ms each. '
+                f'Wrote {prof_path} and {prof_path.with_suffix(".collapsed")}'
+            )
+        )
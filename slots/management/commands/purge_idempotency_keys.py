@@ -0,0 +1,41 @@
+"""
+Management command to delete expired idempotency records in small batches
+Usage: python manage.py purge_idempotency_keys [--batch-size 1000]
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from slots.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired idempotency records from the database in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of records to delete per statement (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        """Delete records past IDEMPOTENCY_TTL using the expires_at index"""
+        batch_size = options['batch_size']
+        now = timezone.now()
+        deleted_total = 0
+
+        while True:
+            ids = list(
+                IdempotencyRecord.objects.filter(expires_at__lte=now)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            deleted, _ = IdempotencyRecord.objects.filter(pk__in=ids).delete()
+            deleted_total += deleted
+            self.stdout.write(f'Deleted {deleted} expired idempotency record(s)...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Purged {deleted_total} expired idempotency record(s).')
+        )
@@ -0,0 +1,40 @@
+"""
+Management command to delete expired sessions in small batches
+Usage: python manage.py purge_sessions [--batch-size 1000]
+"""
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired sessions from the database in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of sessions to delete per statement (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        """Delete expired sessions without holding one long lock on the table"""
+        batch_size = options['batch_size']
+        now = timezone.now()
+        deleted_total = 0
+
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            deleted_total += deleted
+            self.stdout.write(f'Deleted {deleted} expired session(s)...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Purged {deleted_total} expired session(s).')
+        )
@@ -0,0 +1,70 @@
+"""
+Management command to deliver queued booking notifications
+Usage: python manage.py run_outbox_worker [--batch-size 50] [--threads 4] [--once]
+"""
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from slots.notifications import claim_batch, process_share
+
+
+class Command(BaseCommand):
+    help = 'Drains the notification outbox in batches using a thread pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Messages claimed per batch (default: 50)')
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Concurrent deliveries (default: 4)')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when the outbox is empty (default: 2)')
+        parser.add_argument('--max-attempts', type=int, default=5,
+                            help='Attempts before a message is marked failed (default: 5)')
+        parser.add_argument('--backoff', type=int, default=30,
+                            help='Base retry delay in seconds, doubled per attempt (default: 30)')
+        parser.add_argument('--max-backoff', type=int, default=3600,
+                            help='Longest retry delay in seconds (default: 3600)')
+        parser.add_argument('--lease', type=int, default=300,
+                            help='Seconds a claimed batch stays reserved for this worker (default: 300)')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain what is due now and exit')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        sent_total = failed_total = 0
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            while not self.stopping:
+                batch = claim_batch(options['batch_size'], options['lease'])
+                if not batch:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                # One share per thread, so each thread closes its connection once per batch
+                shares = [batch[i::options['threads']] for i in range(options['threads'])]
+                sent = sum(pool.map(
+                    lambda share: process_share(
+                        share,
+                        options['max_attempts'],
+                        options['backoff'],
+                        options['max_backoff'],
+                    ),
+                    [share for share in shares if share],
+                ))
+                sent_total += sent
+                failed_total += len(batch) - sent
+                self.stdout.write(f'Delivered {sent}/{len(batch)} message(s)...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Outbox worker stopped: {sent_total} sent, {failed_total} failed attempt(s).')
+        )
+
+    def stop(self, signum, frame):
+        """Finish the current batch, then exit"""
+        self.stopping = True
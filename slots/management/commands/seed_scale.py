@@ -0,0 +1,372 @@
+"""
+Management command to generate a large, reproducible dataset for performance testing
+Usage: python manage.py seed_scale [--users 10000] [--days 365] [--start 2025-01-01]
+       [--bookings-per-slot poisson:2] [--cancel-rate 0.1] [--seed 42]
+       [--batch-size 5000] [--no-copy] [--venue slug]
+
+The same arguments and seed always produce the same users, slots and
+bookings. Rows are written in batches with bulk_create, or with COPY on
+PostgreSQL. Users get a fast MD5 password hash; they can only log in where
+ALLOW_TEST_PASSWORD_HASHER=1. Slots are created at the venue with the
+given slug, or at the default venue. Existing users and slots are reused, and
+slots that already have bookings are left alone, so re-running tops up a
+dataset instead of duplicating it.
+
+--bookings-per-slot takes one of
+    poisson:MEAN            e.g. poisson:2 (default)
+    uniform:LOW-HIGH        e.g. uniform:0-4
+    fixed:N                 e.g. fixed:1
+    N=WEIGHT,N=WEIGHT,...   e.g. 0=30,1=40,2=20,3=10
+scaled by demand: evening and weekend slots get more bookings than weekday
+mornings. Frequent users book more than occasional ones.
+"""
+import io
+import math
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from slots.cache import invalidate_availability, invalidate_history
+from slots.models import Booking, Slot, Venue
+
+
+SLOT_DEFAULTS = {
+    'box': {'price': Decimal('500.00'), 'max_players': 6},
+    'normal': {'price': Decimal('400.00'), 'max_players': 11},
+}
+BAND_DEMAND = {'morning': 0.7, 'evening': 1.4}
+WEEKEND_DEMAND = 1.25
+
+
+def parse_distribution(spec):
+    """Return a sampler(rng) -> int for a --bookings-per-slot spec"""
+    kind, _, value = spec.partition(':')
+    try:
+        if kind == 'poisson':
+            mean = float(value)
+            if mean < 0:
+                raise ValueError
+            return lambda rng: poisson(rng, mean)
+        if kind == 'uniform':
+            low, high = (int(part) for part in value.split('-'))
+            if not 0 <= low <= high:
+                raise ValueError
+            return lambda rng: rng.randint(low, high)
+        if kind == 'fixed':
+            count = int(value)
+            if count < 0:
+                raise ValueError
+            return lambda rng: count
+        if '=' in spec:
+            pairs = [part.split('=') for part in spec.split(',')]
+            counts = [int(count) for count, _ in pairs]
+            weights = [float(weight) for _, weight in pairs]
+            if min(counts) < 0 or min(weights) < 0 or not sum(weights):
+                raise ValueError
+            return lambda rng: rng.choices(counts, weights)[0]
+    except ValueError:
+        pass
+    raise CommandError(f'Invalid --bookings-per-slot {spec!r}')
+
+
+def poisson(rng, mean):
+    if mean >= 30:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    # Knuth's method, fine for small means
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def demand(slot_date, time_slot):
+    """Relative popularity of a slot"""
+    band = 'morning' if time_slot in Slot.TIME_BANDS['morning'] else 'evening'
+    factor = BAND_DEMAND[band]
+    if slot_date.weekday() >= 5:
+        factor *= WEEKEND_DEMAND
+    return factor
+
+
+def scaled(rng, count, factor):
+    """count * factor, rounded up or down at random so the mean is exact"""
+    value = count * factor
+    whole = int(value)
+    return whole + (rng.random() < value - whole)
+
+
+class RowWriter:
+    """Insert rows given as tuples, with bulk_create or PostgreSQL COPY"""
+
+    def __init__(self, use_copy, batch_size):
+        self.use_copy = use_copy
+        self.batch_size = batch_size
+
+    def write(self, model, fields, rows):
+        """Insert an iterable of tuples in batches; returns the row count"""
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                written += self._flush(model, fields, batch)
+                batch = []
+        if batch:
+            written += self._flush(model, fields, batch)
+        return written
+
+    def _flush(self, model, fields, batch):
+        with transaction.atomic():
+            if self.use_copy:
+                self._copy(model, fields, batch)
+            else:
+                model.objects.bulk_create(
+                    [model(**dict(zip(fields, row))) for row in batch],
+                    batch_size=self.batch_size,
+                )
+        return len(batch)
+
+    def _copy(self, model, fields, batch):
+        columns = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+        sql = f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN'
+        buffer = io.StringIO()
+        for row in batch:
+            buffer.write('\t'.join(copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                cursor.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+
+def copy_value(value):
+    """Format a value for COPY's text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class Command(BaseCommand):
+    help = 'Generates users, slots and bookings at scale for performance testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10000,
+            help='Number of seed users (default: 10000)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Number of days of slots (default: 365)',
+        )
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            default=None,
+            help='First slot date, YYYY-MM-DD (default: --days before today, so the data is history)',
+        )
+        parser.add_argument(
+            '--bookings-per-slot',
+            default='poisson:2',
+            help='Distribution of bookings per slot (default: poisson:2)',
+        )
+        parser.add_argument(
+            '--cancel-rate',
+            type=float,
+            default=0.1,
+            help='Fraction of bookings that are cancelled (default: 0.1)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed (default: 42)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per INSERT/COPY batch (default: 5000)',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed_user_',
+            help='Username prefix of seed users (default: seed_user_)',
+        )
+        parser.add_argument(
+            '--password',
+            default='seedpass',
+            help='Password of every seed user (default: seedpass)',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Use bulk_create even on PostgreSQL',
+        )
+        parser.add_argument(
+            '--venue',
+            help='Slug of the venue to create slots at (default: the first venue)',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--users, --days and --batch-size must be at least 1')
+        if not 0 <= options['cancel_rate'] <= 1:
+            raise CommandError('--cancel-rate must be between 0 and 1')
+        bookings_per_slot = parse_distribution(options['bookings_per_slot'])
+        if options['venue']:
+            venue = Venue.objects.filter(slug=options['venue']).first()
+            if venue is None:
+                raise CommandError(f"No venue with slug {options['venue']!r}")
+        else:
+            venue = Venue.get_default() or Venue.objects.create()
+        start_date = options['start'] or timezone.localdate() - timedelta(days=options['days'])
+        end_date = start_date + timedelta(days=options['days'] - 1)
+        use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        writer = RowWriter(use_copy, options['batch_size'])
+        seed = options['seed']
+        self.stdout.write(f"Writing with {'COPY' if use_copy else 'bulk_create'}, seed {seed}.")
+
+        user_ids = self.timed('users', lambda: self.seed_users(writer, options, seed))
+        slots = self.timed('slots', lambda: self.seed_slots(writer, venue, start_date, end_date))
+        self.timed('bookings', lambda: self.seed_bookings(
+            writer, user_ids, slots, bookings_per_slot, options['cancel_rate'], seed,
+        ))
+
+        if use_copy:
+            with connection.cursor() as cursor:
+                for model in (User, Slot, Booking):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+        # bulk_create and COPY don't send post_save
+        invalidate_availability(venue.pk)
+        invalidate_history()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Seeded {len(user_ids)} users and {len(slots)} slots at {venue.name} '
+            f'from {start_date} to {end_date}.'
+        ))
+
+    def timed(self, label, func):
+        start = time.perf_counter()
+        result = func()
+        self.stdout.write(f'  {label}: {time.perf_counter() - start:.1f}s')
+        return result
+
+    def seed_users(self, writer, options, seed):
+        """Create missing seed users; returns their ids in username order"""
+        prefix = options['prefix']
+        names = [f'{prefix}{index:07d}' for index in range(options['users'])]
+        existing = dict(User.objects.filter(username__startswith=prefix).values_list('username', 'id'))
+        # One hash for everyone: MD5 is fast, but hashing a million times still isn't free
+        password = MD5PasswordHasher().encode(options['password'], f'seed{seed}')
+        now = timezone.now()
+        created = writer.write(
+            User,
+            ['username', 'email', 'password', 'first_name', 'last_name',
+             'is_staff', 'is_superuser', 'is_active', 'date_joined'],
+            (
+                (name, f'{name}@example.com', password, '', '', False, False, True, now)
+                for name in names if name not in existing
+            ),
+        )
+        if created:
+            existing = dict(User.objects.filter(username__startswith=prefix).values_list('username', 'id'))
+        self.stdout.write(f'  {created} user(s) created, {len(names) - created} already existed')
+        return [existing[name] for name in names]
+
+    def seed_slots(self, writer, venue, start_date, end_date):
+        """Create missing slots at venue; returns (id, date, time_slot, max_players) of its slots in range"""
+        existing = set(
+            Slot.objects.filter(venue=venue, date__range=(start_date, end_date))
+            .values_list('date', 'time_slot', 'cricket_type')
+        )
+        now = timezone.now()
+        rows = []
+        slot_date = start_date
+        while slot_date <= end_date:
+            for cricket_type, defaults in SLOT_DEFAULTS.items():
+                for time_slot, _ in Slot.TIME_SLOT_CHOICES:
+                    if (slot_date, time_slot, cricket_type) not in existing:
+                        rows.append((
+                            venue.pk, slot_date, time_slot, cricket_type, defaults['price'],
+                            defaults['max_players'], False, now, now,
+                        ))
+            slot_date += timedelta(days=1)
+        created = writer.write(
+            Slot,
+            ['venue_id', 'date', 'time_slot', 'cricket_type', 'price', 'max_players', 'is_closed',
+             'created_at', 'updated_at'],
+            rows,
+        )
+        self.stdout.write(f'  {created} slot(s) created, {len(existing)} already existed')
+        return list(
+            Slot.objects.filter(venue=venue, date__range=(start_date, end_date))
+            .order_by('date', 'time_slot', 'cricket_type')
+            .values_list('id', 'date', 'time_slot', 'max_players')
+        )
+
+    def seed_bookings(self, writer, user_ids, slots, bookings_per_slot, cancel_rate, seed):
+        booked = set(
+            Booking.objects.filter(slot__date__range=(slots[0][1], slots[-1][1]))
+            .values_list('slot_id', flat=True).distinct()
+        ) if slots else set()
+        # A separate stream per table keeps bookings identical however many users/slots existed
+        rng = random.Random(f'{seed}:bookings')
+        now = timezone.now()
+
+        def rows():
+            for slot_id, slot_date, time_slot, max_players in slots:
+                # Draw even for skipped slots, so the other slots get the same bookings
+                count = scaled(rng, bookings_per_slot(rng), demand(slot_date, time_slot))
+                chosen = set()
+                remaining = max_players
+                for _ in range(count):
+                    user_id = self.pick_user(rng, user_ids, chosen)
+                    if user_id is None:
+                        break
+                    cancelled = rng.random() < cancel_rate
+                    players = min(1 + int(rng.expovariate(1 / 1.5)), max_players)
+                    if not cancelled:
+                        if remaining == 0:
+                            break
+                        players = min(players, remaining)
+                        remaining -= players
+                    chosen.add(user_id)
+                    if slot_id not in booked:
+                        yield (
+                            user_id, slot_id, players,
+                            'cancelled' if cancelled else 'confirmed', None, now, now,
+                        )
+
+        created = writer.write(
+            Booking,
+            ['user_id', 'slot_id', 'players', 'status', 'expires_at', 'created_at', 'updated_at'],
+            rows(),
+        )
+        self.stdout.write(f'  {created} booking(s) created, {len(booked)} slot(s) already had bookings')
+
+    @staticmethod
+    def pick_user(rng, user_ids, chosen):
+        """A user not yet on this slot, skewed towards frequent players"""
+        for _ in range(10):
+            user_id = user_ids[int(len(user_ids) * rng.random() ** 2)]
+            if user_id not in chosen:
+                return user_id
+        return None
@@ -0,0 +1,120 @@
+"""
+Management command to summarize the slow-query log
+Usage: python manage.py slow_queries [--top 10] [--sort total|count|max|mean] [--plans] [--clear]
+
+Groups SLOW_QUERY_LOG entries by fingerprint (the SQL with literals
+replaced by ?), so one missing index shows up as one line however many
+different dates or ids it was queried with.
+"""
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+SORT_KEYS = {
+    'total': lambda group: group['total_ms'],
+    'count': lambda group: group['count'],
+    'max': lambda group: group['max_ms'],
+    'mean': lambda group: group['total_ms'] / group['count'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Aggregates the slow-query log by normalized SQL fingerprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=None,
+            help='Log file to read (default: SLOW_QUERY_LOG)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of fingerprints to show (default: 10)',
+        )
+        parser.add_argument(
+            '--sort',
+            choices=sorted(SORT_KEYS),
+            default='total',
+            help='Order by total, count, max or mean time (default: total)',
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print the latest EXPLAIN plan for each fingerprint',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Empty the log after printing the report',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['file'] or settings.SLOW_QUERY_LOG)
+        if not path.exists():
+            self.stdout.write(f'No slow queries logged yet ({path} does not exist).')
+            return
+
+        groups = self.aggregate(path)
+        if not groups:
+            self.stdout.write('The slow-query log is empty.')
+            return
+
+        ranked = sorted(groups.values(), key=SORT_KEYS[options['sort']], reverse=True)
+        for group in ranked[:options['top']]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n[{group['fingerprint']}] {group['count']}x  "
+                f"total {group['total_ms']:.0f} ms  "
+                f"mean {group['total_ms'] / group['count']:.1f} ms  "
+                f"max {group['max_ms']:.1f} ms"
+            ))
+            self.stdout.write(f"  {group['normalized'][:500]}")
+            for location, count in group['callers'].most_common(3):
+                self.stdout.write(f'  called from {location} ({count}x)')
+            if options['plans'] and group['explain']:
+                self.stdout.write('  plan:')
+                for line in group['explain'].splitlines():
+                    self.stdout.write(f'    {line}')
+
+        total = sum(group['count'] for group in groups.values())
+        self.stdout.write(
+            self.style.SUCCESS(f'\n✅ {total} slow quer{"y" if total == 1 else "ies"} in {len(groups)} fingerprint(s).')
+        )
+
+        if options['clear']:
+            path.write_text('', encoding='utf-8')
+            self.stdout.write(f'Cleared {path}.')
+
+    def aggregate(self, path):
+        """Return {fingerprint: summary} for every entry in the log"""
+        groups = {}
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # partially written line
+                group = groups.setdefault(entry['fingerprint'], {
+                    'fingerprint': entry['fingerprint'],
+                    'normalized': entry['normalized'],
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'callers': Counter(),
+                    'explain': None,
+                })
+                group['count'] += 1
+                group['total_ms'] += entry['duration_ms']
+                group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+                location = entry.get('caller') or 'unknown'
+                if entry.get('template'):
+                    location += f" (template {entry['template']})"
+                group['callers'][location] += 1
+                if entry.get('explain'):
+                    group['explain'] = entry['explain']
+        return groups
@@ -0,0 +1,64 @@
+"""
+Prometheus metrics for Cricket Slot Booking System
+
+Metrics are plain prometheus_client objects in the process's default
+registry. Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py)
+makes every worker write its values to mmap files in that directory, and
+/metrics aggregates all of them - so the numbers don't depend on which
+worker serves the scrape.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+
+REQUEST_LATENCY = Histogram(
+    'cricket_http_request_duration_seconds',
+    'Time spent handling a request, by URL name',
+    ['view', 'method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    'cricket_http_requests_total',
+    'Requests handled, by URL name and status code',
+    ['view', 'method', 'status'],
+)
+DB_QUERIES = Histogram(
+    'cricket_db_queries_per_request',
+    'Database queries run while handling a request, by URL name',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+
+BOOKINGS_CREATED = Counter('cricket_bookings_created_total', 'Bookings confirmed')
+BOOKINGS_CANCELLED = Counter('cricket_bookings_cancelled_total', 'Bookings cancelled by users')
+BOOKINGS_RESCHEDULED = Counter('cricket_bookings_rescheduled_total', 'Bookings moved to another slot')
+BOOKINGS_REJECTED = Counter(
+    'cricket_bookings_rejected_total',
+    'Hold, booking or reschedule attempts refused (reason: full, closed, duplicate, policy)',
+    ['reason'],
+)
+
+CACHE_REQUESTS = Counter(
+    'cricket_cache_requests_total',
+    'Availability cache lookups, by entry name and hit/miss',
+    ['name', 'result'],
+)
+
+
+def collect():
+    """Render every metric in the text exposition format"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
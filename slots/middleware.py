@@ -0,0 +1,143 @@
+"""
+Middleware for Cricket Slot Booking System
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.templatetags.static import static
+from django.utils.cache import patch_cache_control
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics, profiling
+
+
+logger = logging.getLogger(__name__)
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, with content-hashed files cached for one year
+    ('public, immutable') instead of WhiteNoise's ten-year default.
+    """
+    FOREVER = 365 * 24 * 60 * 60
+
+
+class PreloadLinkMiddleware:
+    """
+    Add `Link: <...>; rel=preload` headers for the critical stylesheets
+    in STATIC_PRELOAD (e.g. 'css/style.css' from base.html) to HTML pages,
+    so the browser starts fetching them before parsing the document.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.link_header = None
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.get('Content-Type', '').startswith('text/html') and not response.has_header('Link'):
+            link = self.get_link_header()
+            if link:
+                response['Link'] = link
+        return response
+
+    def get_link_header(self):
+        """Resolved once per process: static() returns the hashed URL from the manifest"""
+        if self.link_header is None:
+            self.link_header = ', '.join(
+                f'<{static(path)}>; rel=preload; as=style'
+                for path in getattr(settings, 'STATIC_PRELOAD', ())
+            )
+        return self.link_header
+
+
+class CachePolicyMiddleware:
+    """
+    Safety net for cache_public: a response that sets a cookie (session,
+    CSRF token, flash messages) must never be stored by a shared cache.
+    Place it above the session, CSRF and messages middleware so it sees
+    the cookies they add.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        cache_control = response.get('Cache-Control', '')
+        if response.cookies and 'public' in cache_control:
+            del response['Cache-Control']
+            patch_cache_control(response, private=True, no_cache=True, max_age=0)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status and database query count for every request,
+    labelled with the resolved URL name (e.g. 'slots:book_slot'). Paths
+    that don't resolve share one label, so 404 scans can't grow the number
+    of series. Place it right after StaticFilesMiddleware.
+    """
+    METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_count = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        method = request.method if request.method in self.METHODS else 'other'
+        metrics.REQUEST_LATENCY.labels(view, method).observe(duration)
+        metrics.REQUESTS.labels(view, method, response.status_code).inc()
+        metrics.DB_QUERIES.labels(view).observe(query_count)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled requests (PROFILING_SAMPLE_RATE) and requests with a
+    valid X-Profile-Token header; see slots.profiling. Unsampled requests
+    only pay for a random() call and a header lookup. One request per
+    process is profiled at a time. Only token holders get the profile's
+    name back (X-Profile), and a profile that can't be saved is logged
+    rather than failing the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        if not profiling.should_profile(request, self.sample_rate):
+            return self.get_response(request)
+        if not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            with profiling.Profile() as profile:
+                response = self.get_response(request)
+            match = request.resolver_match
+            try:
+                path = profile.save(match.view_name if match else request.path)
+            except OSError:
+                logger.exception('Could not save the profile of %s', request.path)
+                return response
+        finally:
+            self.lock.release()
+        if profiling.has_valid_token(request):
+            response['X-Profile'] = path.stem
+        return response
@@ -0,0 +1,57 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+
+def check_duplicates(apps, schema_editor):
+    """
+    Fail with a readable list of the users that would break the indexes
+    (usernames or emails equal but for case) instead of an IntegrityError
+    halfway through the deploy. They have to be merged or renamed by hand.
+    """
+    User = apps.get_model('auth', 'User')
+    problems = []
+    for field, users in (('username', User.objects.all()), ('email', User.objects.exclude(email=''))):
+        clashes = (
+            users.annotate(folded=Upper(field)).values('folded')
+            .annotate(count=Count('id')).filter(count__gt=1).values_list('folded', flat=True)
+        )
+        for folded in clashes:
+            matches = users.annotate(folded=Upper(field)).filter(folded=folded).order_by('id')
+            listed = ', '.join(f'{user.username} (id {user.pk}, {field} {getattr(user, field)!r})' for user in matches)
+            problems.append(f'{field} {folded.lower()!r}: {listed}')
+    if problems:
+        raise RuntimeError(
+            'Cannot add case-insensitive unique indexes on auth_user; '
+            'rename or merge these users first:\n  ' + '\n  '.join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+    """
+    Case-insensitive unique indexes on auth_user so registration can rely on
+    the database instead of pre-checking with exists() queries.
+
+    UPPER() matches the expression Django emits for iexact/istartswith, so the
+    indexes also serve case-insensitive lookups. Blank emails are excluded to
+    keep createsuperuser and admin-created users without email working.
+    Existing users that clash under these rules stop the migration before
+    any index is created.
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('slots', '0002_venue'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.RunSQL(
+            sql='CREATE UNIQUE INDEX slots_auth_user_username_ci_uniq ON auth_user (UPPER(username));',
+            reverse_sql='DROP INDEX slots_auth_user_username_ci_uniq;',
+        ),
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX slots_auth_user_email_ci_uniq ON auth_user (UPPER(email)) WHERE email <> '';",
+            reverse_sql='DROP INDEX slots_auth_user_email_ci_uniq;',
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+TRIGRAM_INDEXES = {
+    'slots_auth_user_username_trgm': 'UPPER(username)',
+    'slots_auth_user_email_trgm': 'UPPER(email)',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Back admin username/email prefix search with pg_trgm on PostgreSQL"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+    for name, expression in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON auth_user USING gin ({expression} gin_trgm_ops);'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0003_auth_user_case_insensitive_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
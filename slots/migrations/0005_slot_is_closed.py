@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0004_auth_user_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slot',
+            name='is_closed',
+            field=models.BooleanField(default=False, help_text='Closed slots are shown but cannot be booked'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.9 on 2026-10-19 06:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('slots', '0005_slot_is_closed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSlot',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('time_slot', models.CharField(choices=[('6-7', '6:00 AM - 7:00 AM'), ('7-8', '7:00 AM - 8:00 AM'), ('8-9', '8:00 AM - 9:00 AM'), ('5-6', '5:00 PM - 6:00 PM'), ('6-7pm', '6:00 PM - 7:00 PM'), ('7-8pm', '7:00 PM - 8:00 PM')], max_length=10)),
+                ('cricket_type', models.CharField(choices=[('box', 'Box Cricket'), ('normal', 'Normal Cricket')], max_length=10)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('max_players', models.IntegerField()),
+                ('is_closed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Slot',
+                'verbose_name_plural': 'Archived Slots',
+                'ordering': ['date', 'time_slot'],
+                'indexes': [models.Index(fields=['date'], name='slots_archslot_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='slots.archivedslot')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Booking',
+                'verbose_name_plural': 'Archived Bookings',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'status', '-created_at'], name='slots_archbooking_user_idx')],
+            },
+        ),
+    ]
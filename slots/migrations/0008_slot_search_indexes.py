@@ -0,0 +1,21 @@
+# Generated by Django 4.2.9 on 2026-10-19 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0007_outbox_message'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='slot',
+            index=models.Index(fields=['cricket_type', 'date', 'time_slot'], name='slots_slot_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='slot',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['date', 'time_slot'], name='slots_slot_open_date_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.9 on 2026-10-19 06:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0008_slot_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='players',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='players',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Number of players covered by this booking', validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.9 on 2026-10-19 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0010_booking_active_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='When a pending hold is released (empty holds until changed)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'expires_at'], name='slots_booking_hold_idx'),
+        ),
+    ]
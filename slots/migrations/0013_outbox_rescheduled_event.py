@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0012_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='event',
+            field=models.CharField(choices=[('booking_confirmed', 'Booking confirmed'), ('booking_cancelled', 'Booking cancelled'), ('booking_rescheduled', 'Booking rescheduled')], max_length=30),
+        ),
+    ]
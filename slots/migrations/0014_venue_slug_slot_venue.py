@@ -0,0 +1,30 @@
+# Generated by Django 4.2.9 on 2026-10-19 07:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0013_outbox_rescheduled_event'),
+    ]
+
+    operations = [
+        # Nullable first; 0015 fills them in and 0016 adds the constraints
+        migrations.AddField(
+            model_name='venue',
+            name='slug',
+            field=models.SlugField(blank=True, help_text="Used in the venue's URLs (/v/<slug>/); filled in from the name if left empty", max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='slot',
+            name='venue',
+            field=models.ForeignKey(help_text='Ground this slot is at', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='slots', to='slots.venue'),
+        ),
+        migrations.AddField(
+            model_name='archivedslot',
+            name='venue',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_slots', to='slots.venue'),
+        ),
+    ]
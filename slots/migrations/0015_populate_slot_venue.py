@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def populate_venues(apps, schema_editor):
+    """Give every venue a slug and put existing slots at the original venue"""
+    Venue = apps.get_model('slots', 'Venue')
+    Slot = apps.get_model('slots', 'Slot')
+    ArchivedSlot = apps.get_model('slots', 'ArchivedSlot')
+
+    used = set()
+    for venue in Venue.objects.order_by('pk'):
+        base = slugify(venue.name)[:90] or 'venue'
+        slug, number = base, 2
+        while slug in used:
+            slug, number = f'{base}-{number}', number + 1
+        used.add(slug)
+        venue.slug = slug
+        venue.save(update_fields=['slug'])
+
+    if not (Slot.objects.exists() or ArchivedSlot.objects.exists()):
+        return
+    default = Venue.objects.order_by('pk').first()
+    if default is None:
+        default = Venue.objects.create(slug='box-cricket-turf')
+    Slot.objects.filter(venue__isnull=True).update(venue=default)
+    ArchivedSlot.objects.filter(venue__isnull=True).update(venue=default)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0014_venue_slug_slot_venue'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_venues, migrations.RunPython.noop),
+    ]
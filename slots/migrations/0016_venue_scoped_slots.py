@@ -0,0 +1,49 @@
+# Generated by Django 4.2.9 on 2026-10-19 07:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0015_populate_slot_venue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='venue',
+            name='slug',
+            field=models.SlugField(blank=True, help_text="Used in the venue's URLs (/v/<slug>/); filled in from the name if left empty", max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='slot',
+            name='venue',
+            field=models.ForeignKey(help_text='Ground this slot is at', on_delete=django.db.models.deletion.PROTECT, related_name='slots', to='slots.venue'),
+        ),
+        migrations.AlterField(
+            model_name='archivedslot',
+            name='venue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_slots', to='slots.venue'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='slot',
+            unique_together={('venue', 'date', 'time_slot', 'cricket_type')},
+        ),
+        migrations.RemoveIndex(
+            model_name='slot',
+            name='slots_slot_type_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='slot',
+            name='slots_slot_open_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='slot',
+            index=models.Index(fields=['venue', 'cricket_type', 'date', 'time_slot'], name='slots_slot_venue_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='slot',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['venue', 'date', 'time_slot'], name='slots_slot_venue_open_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-19 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slots', '0016_venue_scoped_slots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='slot',
+            index=models.Index(fields=['date', 'time_slot'], name='slots_slot_date_idx'),
+        ),
+    ]
@@ -2,8 +2,12 @@
 Models for Cricket Slot Booking System
 """
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
+from django.utils import timezone
+from django.utils.text import slugify
 from datetime import datetime
 
 
@@ -16,6 +20,12 @@ class Venue(models.Model):
         default="Box Cricket Turf",
         help_text="Name of the venue"
     )
+    slug = models.SlugField(
+        max_length=100,
+        unique=True,
+        blank=True,
+        help_text="Used in the venue's URLs (/v/<slug>/); filled in from the name if left empty"
+    )
     
     # Amenities
     has_seating = models.BooleanField(default=True, help_text="Seating area available")
@@ -80,6 +90,25 @@ class Venue(models.Model):
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = self.unique_slug(self.name)
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def unique_slug(cls, name):
+        """slugify(name), with a number appended if another venue has it"""
+        base = slugify(name)[:90] or 'venue'
+        slug, number = base, 2
+        while cls.objects.filter(slug=slug).exists():
+            slug, number = f'{base}-{number}', number + 1
+        return slug
+    
+    @classmethod
+    def get_default(cls):
+        """The original venue, used by the URLs that don't name one"""
+        return cls.objects.order_by('pk').first()
+    
     @property
     def weekday_advance_amount(self):
         """Get advance amount for weekday booking"""
@@ -91,6 +120,46 @@ class Venue(models.Model):
         return (self.weekend_price * self.advance_percentage) / 100
 
 
+class SlotQuerySet(models.QuerySet):
+    """
+    Query helpers for slot listings and search
+    """
+    
+    def upcoming(self, today):
+        """Slots on or after today"""
+        return self.filter(date__gte=today)
+    
+    def with_booked_count(self):
+        """
+        Annotate booked players (confirmed plus unexpired holds) and free
+        spots in the listing query,
+        so Slot.booked_count / is_available don't query per slot.
+        
+        A correlated subquery (rather than JOIN + GROUP BY) lets LIMIT
+        queries walk the date index and stop early.
+        """
+        confirmed = (
+            Booking.objects.holding_capacity().filter(slot=models.OuterRef('pk'))
+            .order_by()
+            .values('slot')
+            .annotate(total=models.Sum('players'))
+            .values('total')
+        )
+        return self.annotate(
+            confirmed_count=Coalesce(models.Subquery(confirmed), 0),
+        ).annotate(
+            spots_left=models.F('max_players') - models.F('confirmed_count'),
+        )
+    
+    def bookable(self, min_spots=1):
+        """Open slots with at least min_spots free (needs with_booked_count)"""
+        return self.filter(is_closed=False, spots_left__gte=min_spots)
+    
+    def chronological(self):
+        """Order by date, then by real start time (time_slot keys don't sort by time)"""
+        return self.order_by('date', Slot.time_slot_rank(), 'cricket_type')
+
+
 class Slot(models.Model):
     """
     Represents a Cricket Slot available for booking
@@ -109,6 +178,22 @@ class Slot(models.Model):
         ('7-8pm', '7:00 PM - 8:00 PM'),
     ]
     
+    TIME_BAND_CHOICES = [
+        ('morning', 'Morning'),
+        ('evening', 'Evening'),
+    ]
+    
+    TIME_BANDS = {
+        'morning': ['6-7', '7-8', '8-9'],
+        'evening': ['5-6', '6-7pm', '7-8pm'],
+    }
+    
+    venue = models.ForeignKey(
+        Venue,
+        on_delete=models.PROTECT,
+        related_name='slots',
+        help_text="Ground this slot is at"
+    )
     date = models.DateField(help_text="Date of the cricket match")
     time_slot = models.CharField(
         max_length=10,
@@ -130,11 +215,30 @@ class Slot(models.Model):
         default=11,
         help_text="Maximum number of players"
     )
+    is_closed = models.BooleanField(
+        default=False,
+        help_text="Closed slots are shown but cannot be booked"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = SlotQuerySet.as_manager()
+    
     class Meta:
-        unique_together = ('date', 'time_slot', 'cricket_type')
+        # Leading with venue keeps one venue's listings to its own index range
+        unique_together = ('venue', 'date', 'time_slot', 'cricket_type')
+        indexes = [
+            # Search by type within a date range
+            models.Index(fields=['venue', 'cricket_type', 'date', 'time_slot'], name='slots_slot_venue_type_idx'),
+            # "Next available" seeks the first open slot by date
+            models.Index(
+                fields=['venue', 'date', 'time_slot'],
+                condition=models.Q(is_closed=False),
+                name='slots_slot_venue_open_idx',
+            ),
+            # Date-only filters across venues: all-venue reports, the admin date filter, archiving
+            models.Index(fields=['date', 'time_slot'], name='slots_slot_date_idx'),
+        ]
         ordering = ['date', 'time_slot']
         verbose_name = 'Cricket Slot'
         verbose_name_plural = 'Cricket Slots'
@@ -142,16 +246,59 @@ class Slot(models.Model):
     def __str__(self):
         return f"{self.cricket_type.upper()} - {self.date} - {self.get_time_slot_display()}"
     
+    @classmethod
+    def time_slot_rank(cls):
+        """SQL expression ranking time_slot by start time"""
+        return models.Case(
+            *[models.When(time_slot=key, then=rank) for rank, (key, label) in enumerate(cls.TIME_SLOT_CHOICES)],
+            output_field=models.IntegerField(),
+        )
+    
     @property
     def is_available(self):
-        """Check if slot is available (not fully booked)"""
-        booking_count = Booking.objects.filter(slot=self, status='confirmed').count()
-        return booking_count < self.max_players
+        """Check if slot is available (open and not fully booked)"""
+        if self.is_closed:
+            return False
+        return self.booked_count < self.max_players
     
     @property
     def booked_count(self):
-        """Get number of confirmed bookings"""
-        return Booking.objects.filter(slot=self, status='confirmed').count()
+        """Get number of players on confirmed bookings and live holds (annotated by with_booked_count if present)"""
+        if 'confirmed_count' in self.__dict__:
+            return self.confirmed_count
+        return Booking.objects.holding_capacity().filter(slot=self).aggregate(
+            total=Coalesce(models.Sum('players'), 0)
+        )['total']
+    
+    @property
+    def spots_left(self):
+        """Number of players that can still join"""
+        if 'spots_left' in self.__dict__:
+            return self.__dict__['spots_left']
+        return max(self.max_players - self.booked_count, 0)
+    
+    @spots_left.setter
+    def spots_left(self, value):
+        # Lets with_booked_count() annotate the same name
+        self.__dict__['spots_left'] = value
+
+
+class BookingQuerySet(models.QuerySet):
+    """
+    Capacity helpers; a `pending` booking is a hold that counts against
+    capacity until its expires_at passes
+    """
+    
+    def holding_capacity(self):
+        """Confirmed bookings plus unexpired holds"""
+        live_hold = models.Q(status='pending') & (
+            models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=timezone.now())
+        )
+        return self.filter(models.Q(status='confirmed') | live_hold)
+    
+    def expired_holds(self):
+        """Holds whose time ran out (served by slots_booking_hold_idx)"""
+        return self.filter(status='pending', expires_at__lte=timezone.now())
 
 
 class Booking(models.Model):
@@ -166,16 +313,39 @@ class Booking(models.Model):
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
     slot = models.ForeignKey(Slot, on_delete=models.CASCADE, related_name='bookings')
+    players = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+        help_text="Number of players covered by this booking"
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
         default='confirmed'
     )
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a pending hold is released (empty holds until changed)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BookingQuerySet.as_manager()
+    
     class Meta:
-        unique_together = ('user', 'slot')  # Prevent double booking
+        indexes = [
+            # Sweeping expired holds
+            models.Index(fields=['status', 'expires_at'], name='slots_booking_hold_idx'),
+        ]
+        constraints = [
+            # Prevent double booking; cancelled rows don't block rebooking
+            models.UniqueConstraint(
+                fields=['user', 'slot'],
+                condition=models.Q(status__in=['confirmed', 'pending']),
+                name='slots_booking_active_user_slot_uniq',
+            ),
+        ]
         ordering = ['-created_at']
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
@@ -185,16 +355,164 @@ class Booking(models.Model):
     
     def clean(self):
         """Validate booking constraints"""
-        # Check if slot is available
-        if not self.slot.is_available and self.pk is None:
+        # Check if slot has room for this group
+        # (duplicates are rejected by slots_booking_active_user_slot_uniq)
+        if self.pk is None and (self.slot.is_closed or self.players > self.slot.spots_left):
             raise ValidationError('This slot is no longer available.')
-        
-        # Check for duplicate booking
-        existing_booking = Booking.objects.filter(
-            user=self.user,
-            slot=self.slot,
-            status__in=['confirmed', 'pending']
-        ).exclude(pk=self.pk)
-        
-        if existing_booking.exists():
-            raise ValidationError('You have already booked this slot.')
+
+
+class ArchivedSlot(models.Model):
+    """
+    A past slot moved out of the hot Slot table by `archive_bookings`.
+    Keeps the original primary key so rows can be traced back to it.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    venue = models.ForeignKey(Venue, on_delete=models.PROTECT, related_name='archived_slots')
+    date = models.DateField()
+    time_slot = models.CharField(max_length=10, choices=Slot.TIME_SLOT_CHOICES)
+    cricket_type = models.CharField(max_length=10, choices=Slot.CRICKET_TYPE_CHOICES)
+    price = models.DecimalField(max_digits=5, decimal_places=2)
+    max_players = models.IntegerField()
+    is_closed = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['date', 'time_slot']
+        indexes = [models.Index(fields=['date'], name='slots_archslot_date_idx')]
+        verbose_name = 'Archived Slot'
+        verbose_name_plural = 'Archived Slots'
+    
+    def __str__(self):
+        return f"{self.cricket_type.upper()} - {self.date} - {self.get_time_slot_display()}"
+    
+    @classmethod
+    def from_slot(cls, slot):
+        """Build an archive row from a live Slot"""
+        return cls(
+            id=slot.id,
+            venue_id=slot.venue_id,
+            date=slot.date,
+            time_slot=slot.time_slot,
+            cricket_type=slot.cricket_type,
+            price=slot.price,
+            max_players=slot.max_players,
+            is_closed=slot.is_closed,
+            created_at=slot.created_at,
+            updated_at=slot.updated_at,
+        )
+
+
+class ArchivedBooking(models.Model):
+    """
+    A booking for an archived slot.
+    Exposes the same fields as Booking so templates can render either.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    slot = models.ForeignKey(ArchivedSlot, on_delete=models.CASCADE, related_name='bookings')
+    players = models.PositiveSmallIntegerField(default=1)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status', '-created_at'], name='slots_archbooking_user_idx'),
+        ]
+        verbose_name = 'Archived Booking'
+        verbose_name_plural = 'Archived Bookings'
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.slot} - {self.status}"
+    
+    @classmethod
+    def from_booking(cls, booking):
+        """Build an archive row from a live Booking"""
+        return cls(
+            id=booking.id,
+            user_id=booking.user_id,
+            slot_id=booking.slot_id,
+            players=booking.players,
+            status=booking.status,
+            created_at=booking.created_at,
+            updated_at=booking.updated_at,
+        )
+
+
+class OutboxMessage(models.Model):
+    """
+    A notification written in the same transaction as the booking change
+    it describes, and delivered later by `run_outbox_worker`
+    """
+    EVENT_CHOICES = [
+        ('booking_confirmed', 'Booking confirmed'),
+        ('booking_cancelled', 'Booking cancelled'),
+        ('booking_rescheduled', 'Booking rescheduled'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    event = models.CharField(max_length=30, choices=EVENT_CHOICES)
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbox_messages'
+    )
+    recipient = models.EmailField()
+    payload = models.JSONField(default=dict, help_text="Everything needed to render the message")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Set while a worker is delivering the message"
+    )
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='slots_outbox_due_idx'),
+        ]
+        verbose_name = 'Outbox Message'
+        verbose_name_plural = 'Outbox Messages'
+    
+    def __str__(self):
+        return f"{self.get_event_display()} -> {self.recipient} ({self.status})"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    The outcome of a POST carrying an idempotency key, so a replay of the
+    same form submission returns the same redirect instead of running again
+    """
+    key = models.CharField(max_length=64, unique=True, help_text="Hash of user, path and client token")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_records')
+    path = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    location = models.CharField(max_length=500, blank=True)
+    messages = models.JSONField(default=list, help_text="[level, message] pairs flashed by the first response")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['expires_at'], name='slots_idem_expires_idx')]
+        verbose_name = 'Idempotency Record'
+        verbose_name_plural = 'Idempotency Records'
+    
+    def __str__(self):
+        return f"{self.user_id} {self.path} -> {self.status_code}"
@@ -0,0 +1,159 @@
+"""
+Booking notifications for Cricket Slot Booking System
+
+Views only write OutboxMessage rows (inside the booking transaction); the
+`run_outbox_worker` command delivers them, so sending email never adds
+latency to a request.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+
+logger = logging.getLogger(__name__)
+
+SUBJECTS = {
+    'booking_confirmed': 'Booking confirmed: {cricket_type} on {date} ({time_slot})',
+    'booking_cancelled': 'Booking cancelled: {cricket_type} on {date} ({time_slot})',
+    'booking_rescheduled': 'Booking moved: {cricket_type} on {date} ({time_slot})',
+}
+
+BODIES = {
+    'booking_confirmed': (
+        'Hi {username},\n\n'
+        'Your booking is confirmed.\n\n'
+        '{cricket_type} at {venue}\n{date} ({time_slot})\nPlayers: {players}\nPrice: ₹{price}\n\n'
+        '{contact}'
+    ),
+    'booking_cancelled': (
+        'Hi {username},\n\n'
+        'Your booking has been cancelled.\n\n'
+        '{cricket_type}\n{date} ({time_slot})\n\n'
+        '{contact}'
+    ),
+    'booking_rescheduled': (
+        'Hi {username},\n\n'
+        'Your booking has been moved from {previous_date} ({previous_time_slot}) to:\n\n'
+        '{cricket_type} at {venue}\n{date} ({time_slot})\nPlayers: {players}\n\n'
+        '{contact}'
+    ),
+}
+
+
+def enqueue_booking_event(booking, event, previous_slot=None):
+    """
+    Queue a notification for a booking change.
+    Call inside the transaction that changes the booking so the message is
+    committed (or rolled back) together with it. previous_slot is the slot
+    a rescheduled booking moved from.
+    """
+    if not booking.user.email:
+        return None
+    slot = booking.slot
+    venue = slot.venue
+    payload = {
+        'username': booking.user.username,
+        'cricket_type': slot.get_cricket_type_display(),
+        'date': slot.date.strftime('%d %b %Y'),
+        'time_slot': slot.get_time_slot_display(),
+        'players': booking.players,
+        'price': str(slot.price),
+        'venue': venue.name,
+        'contact': f'Questions? Contact {venue.name} at {venue.phone} or {venue.email}.\n',
+        'venue_email': venue.email,
+    }
+    if previous_slot is not None:
+        payload['previous_date'] = previous_slot.date.strftime('%d %b %Y')
+        payload['previous_time_slot'] = previous_slot.get_time_slot_display()
+    return OutboxMessage.objects.create(
+        event=event,
+        booking=booking,
+        recipient=booking.user.email,
+        payload=payload,
+    )
+
+
+def deliver(message):
+    """Send one outbox message; raises on failure"""
+    venue_email = message.payload.get('venue_email')
+    # Older messages predate group bookings and venues
+    payload = {'players': 1, 'venue': 'the venue', **message.payload}
+    EmailMessage(
+        subject=SUBJECTS[message.event].format(**payload),
+        body=BODIES[message.event].format(**payload),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[message.recipient],
+        reply_to=[venue_email] if venue_email else None,
+    ).send()
+
+
+def claim_batch(batch_size, lease_seconds):
+    """
+    Lease up to batch_size due messages to this worker.
+    Rows locked by another worker are skipped; a lease that expires (e.g. the
+    worker crashed) makes the message claimable again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboxMessage.objects.filter(id__in=ids).update(
+            locked_until=now + timedelta(seconds=lease_seconds)
+        )
+    return list(OutboxMessage.objects.filter(id__in=ids))
+
+
+def backoff_delay(attempts, base_seconds, max_seconds):
+    """Exponential backoff: base, 2*base, 4*base, ... capped at max_seconds"""
+    return timedelta(seconds=min(base_seconds * 2 ** (attempts - 1), max_seconds))
+
+
+def process(message, max_attempts, base_backoff, max_backoff):
+    """Deliver a claimed message and record the outcome; returns True if sent"""
+    message.attempts += 1
+    try:
+        deliver(message)
+    except Exception as exc:
+        logger.warning('Outbox message %s failed (attempt %s): %s', message.pk, message.attempts, exc)
+        message.last_error = str(exc)
+        if message.attempts >= max_attempts:
+            message.status = 'failed'
+        else:
+            message.next_attempt_at = timezone.now() + backoff_delay(
+                message.attempts, base_backoff, max_backoff
+            )
+        sent = False
+    else:
+        message.status = 'sent'
+        message.sent_at = timezone.now()
+        message.last_error = ''
+        sent = True
+    message.locked_until = None
+    message.save(update_fields=[
+        'attempts', 'status', 'sent_at', 'next_attempt_at', 'locked_until', 'last_error',
+    ])
+    return sent
+
+
+def process_share(messages, max_attempts, base_backoff, max_backoff):
+    """
+    Process one worker thread's share of a batch; returns how many were sent.
+    The thread's own database connection is closed afterwards, once per
+    batch, so pool threads don't leak connections.
+    """
+    try:
+        return sum(process(message, max_attempts, base_backoff, max_backoff) for message in messages)
+    finally:
+        connection.close()
@@ -0,0 +1,137 @@
+"""
+Request profiling for Cricket Slot Booking System
+
+A profiled request is run under cProfile and a wall-clock stack sampler
+at the same time, and leaves two files in PROFILING_DIR:
+
+- <name>.prof       pstats dump (python -m pstats, snakeviz, ...)
+- <name>.collapsed  "frame;frame;frame count" lines for flamegraph.pl or
+                    speedscope
+
+Only the newest PROFILING_KEEP profiles are kept. ProfilingMiddleware
+profiles a PROFILING_SAMPLE_RATE fraction of requests, plus any request
+with a valid X-Profile-Token header (`manage.py profile_url --token`).
+"""
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+
+TOKEN_HEADER = 'X-Profile-Token'
+TOKEN_SALT = 'slots.profiling'
+
+
+def make_token():
+    """A signed token that enables profiling for PROFILING_TOKEN_MAX_AGE seconds"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def has_valid_token(request):
+    token = request.headers.get(TOKEN_HEADER)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request, sample_rate):
+    """Cheap check run on every request"""
+    if sample_rate and random.random() < sample_rate:
+        return True
+    return TOKEN_HEADER in request.headers and has_valid_token(request)
+
+
+def frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """
+    Record the target thread's call stack every `interval` seconds from a
+    background thread. Unlike cProfile this sees wall-clock time, so
+    waiting on the database shows up as wide frames.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class Profile:
+    """Context manager running cProfile and the stack sampler together"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005))
+        self.duration = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self._start
+        return False
+
+    def save(self, label):
+        """Write the .prof and .collapsed files; returns the .prof path"""
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', label).strip('-')[:60] or 'root'
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{slug}-{round(self.duration * 1000)}ms"
+        prof_path = directory / f'{name}.prof'
+        self.profiler.dump_stats(prof_path)
+        (directory / f'{name}.collapsed').write_text(self.sampler.collapsed(), encoding='utf-8')
+        rotate(directory, getattr(settings, 'PROFILING_KEEP', 100))
+        return prof_path
+
+
+def rotate(directory, keep):
+    """Delete all but the newest `keep` profiles"""
+    for pattern in ('*.prof', '*.collapsed'):
+        files = sorted(directory.glob(pattern), key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in files[keep:]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,209 @@
+"""
+Occupancy and revenue reports for Cricket Slot Booking System
+
+A report covers a slot date range, for one venue or all of them, grouped
+by day, week, time slot or cricket type. Every figure comes from GROUP BY queries, never from
+iterating bookings: one over the slots (capacity) and one over the
+bookings joined to their slot (players, bookings, revenue), run against
+the live tables and again against the archive tables so history moved by
+`archive_bookings` still counts. All four queries filter on slot date and
+use the date indexes, so the cost follows the range rather than the table
+size. Reports over past dates are cached until the history version
+changes (see slots.cache); reports reaching today are cached for a minute.
+"""
+import datetime
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from .cache import get_or_set_history, get_or_set_recent
+from .models import ArchivedBooking, ArchivedSlot, Booking, Slot
+
+
+GROUP_CHOICES = [
+    ('day', 'Day'),
+    ('week', 'Week'),
+    ('time_slot', 'Time slot'),
+    ('cricket_type', 'Cricket type'),
+]
+
+CSV_HEADER = [
+    'Group', 'Slots', 'Capacity', 'Players booked', 'Occupancy %',
+    'Confirmed bookings', 'Cancelled bookings', 'Cancellation rate %',
+    'Confirmed revenue', 'Advance due',
+]
+
+CONFIRMED = Q(status='confirmed')
+CANCELLED = Q(status='cancelled')
+ZERO = Decimal('0.00')
+
+
+@dataclass
+class ReportRow:
+    key: object
+    label: str
+    slots: int = 0
+    capacity: int = 0
+    players: int = 0
+    confirmed: int = 0
+    cancelled: int = 0
+    revenue: Decimal = ZERO
+    advance_due: Decimal = ZERO
+
+    @property
+    def occupancy(self):
+        """Confirmed players as a percentage of max_players"""
+        return round(100 * self.players / self.capacity, 1) if self.capacity else 0.0
+
+    @property
+    def cancellation_rate(self):
+        """Cancelled bookings as a percentage of confirmed + cancelled"""
+        decided = self.confirmed + self.cancelled
+        return round(100 * self.cancelled / decided, 1) if decided else 0.0
+
+    def as_csv(self):
+        return [
+            self.label, self.slots, self.capacity, self.players, self.occupancy,
+            self.confirmed, self.cancelled, self.cancellation_rate,
+            self.revenue, self.advance_due,
+        ]
+
+
+@dataclass
+class Report:
+    start: datetime.date
+    end: datetime.date
+    group_by: str
+    rows: list
+    total: ReportRow
+    venue: object = None
+
+    @property
+    def group_label(self):
+        return dict(GROUP_CHOICES)[self.group_by]
+
+
+def _group_field(group_by, prefix=''):
+    """Field or expression to GROUP BY; prefix is 'slot__' for booking queries"""
+    if group_by == 'week':
+        return TruncWeek(f'{prefix}date')
+    return F(f"{prefix}{'date' if group_by == 'day' else group_by}")
+
+
+def _label(group_by, key):
+    if group_by == 'day':
+        return key.strftime('%a %d %b %Y')
+    if group_by == 'week':
+        return f"Week of {key.strftime('%d %b %Y')}"
+    if group_by == 'time_slot':
+        return dict(Slot.TIME_SLOT_CHOICES).get(key, key)
+    return dict(Slot.CRICKET_TYPE_CHOICES).get(key, key)
+
+
+def _sort_key(group_by):
+    if group_by == 'time_slot':
+        rank = {key: index for index, (key, _) in enumerate(Slot.TIME_SLOT_CHOICES)}
+        return lambda row: rank.get(row.key, len(rank))
+    return lambda row: row.key
+
+
+def _slot_totals(model, start, end, group_by, venue):
+    """{group: (slots, capacity)}"""
+    slots = model.objects.filter(date__range=(start, end))
+    if venue is not None:
+        slots = slots.filter(venue=venue)
+    rows = (
+        slots
+        .annotate(period=_group_field(group_by))
+        .values('period')
+        .annotate(slots=Count('id'), capacity=Sum('max_players'))
+        .order_by()
+    )
+    return {row['period']: (row['slots'], row['capacity'] or 0) for row in rows}
+
+
+def _booking_totals(model, start, end, group_by, venue):
+    """
+    {group: (players, confirmed, cancelled, revenue, advance due)}; revenue is
+    one slot price per confirmed booking, advance due its venue's percentage
+    """
+    bookings = model.objects.filter(slot__date__range=(start, end))
+    if venue is not None:
+        bookings = bookings.filter(slot__venue=venue)
+    advance = ExpressionWrapper(
+        F('slot__price') * F('slot__venue__advance_percentage') / 100,
+        output_field=DecimalField(max_digits=12, decimal_places=4),
+    )
+    rows = (
+        bookings
+        .annotate(period=_group_field(group_by, 'slot__'))
+        .values('period')
+        .annotate(
+            players=Sum('players', filter=CONFIRMED),
+            confirmed=Count('id', filter=CONFIRMED),
+            cancelled=Count('id', filter=CANCELLED),
+            revenue=Sum('slot__price', filter=CONFIRMED),
+            advance_due=Sum(advance, filter=CONFIRMED),
+        )
+        .order_by()
+    )
+    return {
+        row['period']: (
+            row['players'] or 0, row['confirmed'], row['cancelled'],
+            row['revenue'] or ZERO, row['advance_due'] or ZERO,
+        )
+        for row in rows
+    }
+
+
+def build_report(start, end, group_by, venue=None):
+    """Run the report for slots dated start..end (inclusive) at venue, or all venues; uncached"""
+    rows = {}
+
+    def row_for(key):
+        if key not in rows:
+            rows[key] = ReportRow(key=key, label=_label(group_by, key))
+        return rows[key]
+
+    for slot_model, booking_model in ((Slot, Booking), (ArchivedSlot, ArchivedBooking)):
+        for key, (slots, capacity) in _slot_totals(slot_model, start, end, group_by, venue).items():
+            row = row_for(key)
+            row.slots += slots
+            row.capacity += capacity
+        booking_totals = _booking_totals(booking_model, start, end, group_by, venue)
+        for key, (players, confirmed, cancelled, revenue, advance_due) in booking_totals.items():
+            row = row_for(key)
+            row.players += players
+            row.confirmed += confirmed
+            row.cancelled += cancelled
+            row.revenue += revenue
+            row.advance_due += advance_due
+
+    total = ReportRow(key=None, label='Total')
+    for row in rows.values():
+        row.advance_due = Decimal(row.advance_due).quantize(Decimal('0.01'))
+        for name in ('slots', 'capacity', 'players', 'confirmed', 'cancelled', 'revenue', 'advance_due'):
+            setattr(total, name, getattr(total, name) + getattr(row, name))
+
+    return Report(
+        start=start,
+        end=end,
+        group_by=group_by,
+        rows=sorted(rows.values(), key=_sort_key(group_by)),
+        total=total,
+        venue=venue,
+    )
+
+
+def get_report(start, end, group_by, venue=None):
+    """
+    build_report(), cached per (venue, date range, grouping): until the
+    history changes for past ranges, briefly for ranges reaching today
+    """
+    parts = [venue.pk if venue else 'all', start.isoformat(), end.isoformat(), group_by]
+    if end < timezone.localdate():
+        return get_or_set_history('report', parts, lambda: build_report(start, end, group_by, venue))
+    return get_or_set_recent('report', parts, lambda: build_report(start, end, group_by, venue))
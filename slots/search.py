@@ -0,0 +1,96 @@
+"""
+Structured admin search for Cricket Slot Booking System
+Turns a search term into index-friendly lookups instead of icontains scans
+"""
+import calendar
+import re
+from datetime import date
+
+from django.contrib.admin.utils import get_fields_from_path
+from django.db.models import Q
+
+
+DAY_PATTERNS = [
+    re.compile(r'^(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})$'),
+    re.compile(r'^(?P<day>\d{1,2})[/.-](?P<month>\d{1,2})[/.-](?P<year>\d{4})$'),
+]
+MONTH_PATTERNS = [
+    re.compile(r'^(?P<year>\d{4})-(?P<month>\d{1,2})$'),
+    re.compile(r'^(?P<month>\d{1,2})/(?P<year>\d{4})$'),
+]
+YEAR_PATTERN = re.compile(r'^(?P<year>\d{4})$')
+
+
+def parse_date_term(term):
+    """
+    Parse a date-like search term into an inclusive (start, end) range.
+
+    Accepts 2026-01-31, 31/01/2026, 31-01-2026, 2026-01, 01/2026 and 2026.
+    Returns None if the term is not a valid date.
+    """
+    try:
+        for pattern in DAY_PATTERNS:
+            match = pattern.match(term)
+            if match:
+                day = date(int(match['year']), int(match['month']), int(match['day']))
+                return day, day
+        for pattern in MONTH_PATTERNS:
+            match = pattern.match(term)
+            if match:
+                year, month = int(match['year']), int(match['month'])
+                last_day = calendar.monthrange(year, month)[1]
+                return date(year, month, 1), date(year, month, last_day)
+    except ValueError:
+        return None
+    match = YEAR_PATTERN.match(term)
+    if match:
+        year = int(match['year'])
+        return date(year, 1, 1), date(year, 12, 31)
+    return None
+
+
+class StructuredSearchMixin:
+    """
+    ModelAdmin mixin replacing the default icontains search.
+
+    Every whitespace-separated term must match at least one of:
+    - search_date_field: exact day / month / year range on an indexed date
+    - search_choice_fields: choice fields, matched on key or label prefix
+    - search_prefix_fields: case-insensitive prefix match (LIKE 'term%')
+    """
+    search_date_field = None
+    search_choice_fields = ()
+    search_prefix_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        for term in search_term.split():
+            condition = self.get_search_condition(term)
+            queryset = queryset.filter(condition) if condition else queryset.none()
+        return queryset, False
+
+    def get_search_condition(self, term):
+        """Return a Q matching the term, or None if no field can match it"""
+        condition = Q()
+        date_range = parse_date_term(term) if self.search_date_field else None
+        if date_range:
+            start, end = date_range
+            if start == end:
+                condition |= Q(**{self.search_date_field: start})
+            else:
+                condition |= Q(**{f'{self.search_date_field}__range': (start, end)})
+        for field_path in self.search_choice_fields:
+            keys = self.match_choices(field_path, term)
+            if keys:
+                condition |= Q(**{f'{field_path}__in': keys})
+        for field_path in self.search_prefix_fields:
+            condition |= Q(**{f'{field_path}__istartswith': term})
+        return condition or None
+
+    def match_choices(self, field_path, term):
+        """Choice keys whose key equals the term or whose label starts with it"""
+        field = get_fields_from_path(self.model, field_path)[-1]
+        term = term.lower()
+        return [
+            key for key, label in field.flatchoices
+            if str(key).lower() == term or str(label).lower().startswith(term)
+        ]
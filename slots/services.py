@@ -0,0 +1,243 @@
+"""
+Booking operations for Cricket Slot Booking System
+
+Views call these instead of writing Booking rows themselves, so the
+capacity check and the write happen in one transaction while the slot row
+is locked.
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import Slot, Booking
+from .notifications import enqueue_booking_event
+
+
+class BookingError(Exception):
+    """A booking request that can't be fulfilled; str() is shown to the user"""
+    reason = 'other'  # label on cricket_bookings_rejected_total
+
+
+class SlotClosedError(BookingError):
+    reason = 'closed'
+
+
+class SlotFullError(BookingError):
+    reason = 'full'
+
+
+class AlreadyBookedError(BookingError):
+    reason = 'duplicate'
+
+
+class RescheduleNotAllowedError(BookingError):
+    reason = 'policy'
+
+
+@contextmanager
+def counting_rejections():
+    """Count BookingErrors raised inside the block by reason"""
+    try:
+        yield
+    except BookingError as exc:
+        metrics.BOOKINGS_REJECTED.labels(exc.reason).inc()
+        raise
+
+
+def lock_slot(slot_id):
+    """Fetch a slot with its row locked until the end of the transaction"""
+    return Slot.objects.select_for_update().get(pk=slot_id)
+
+
+def release_expired_holds(slot):
+    """Delete this slot's expired holds (call with the slot locked)"""
+    return Booking.objects.expired_holds().filter(slot=slot).delete()[0]
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(seconds=settings.BOOKING_HOLD_SECONDS)
+
+
+def _insert_booking(user, slot, **fields):
+    try:
+        # Savepoint, so a duplicate leaves the outer transaction usable
+        with transaction.atomic():
+            return Booking.objects.create(user=user, slot=slot, **fields)
+    except IntegrityError:
+        raise AlreadyBookedError(
+            f'You have already booked this slot ({slot.get_cricket_type_display()} '
+            f'on {slot.date} {slot.get_time_slot_display()})'
+        )
+
+
+def _check_capacity(slot, players, held=0):
+    """Raise SlotFullError unless `players` fit; `held` spots are the caller's own hold"""
+    spots_left = slot.spots_left + held
+    if players > spots_left:
+        if spots_left:
+            raise SlotFullError(f'Only {spots_left} spot(s) left on this slot.')
+        raise SlotFullError('This slot is no longer available. All spots are booked.')
+
+
+def hold_slot(user, slot_id, players=1):
+    """
+    Hold `players` spots for BOOKING_HOLD_SECONDS while the user confirms.
+
+    The hold is a `pending` booking that counts against capacity until it
+    expires. Opening the page again extends the user's existing hold and
+    resizes it to `players`.
+    """
+    with counting_rejections(), transaction.atomic():
+        slot = lock_slot(slot_id)
+        if slot.is_closed:
+            raise SlotClosedError('This slot is closed for booking.')
+        release_expired_holds(slot)
+
+        hold = Booking.objects.filter(user=user, slot=slot, status='pending').first()
+        if hold is not None:
+            if players != hold.players:
+                _check_capacity(slot, players, held=hold.players)
+                hold.players = players
+            hold.expires_at = hold_expiry()
+            hold.save(update_fields=['players', 'expires_at', 'updated_at'])
+            return hold
+
+        _check_capacity(slot, players)
+        return _insert_booking(user, slot, players=players, status='pending', expires_at=hold_expiry())
+
+
+def create_booking(user, slot_id, players=1):
+    """
+    Book `players` spots on a slot for one user.
+
+    Confirms the user's hold on the slot if it is still live, otherwise
+    books directly. The slot row is locked (SELECT ... FOR UPDATE) before
+    counting booked players, so two groups can't both take the last spots.
+    A second active booking by the same user is rejected by the partial
+    unique constraint on insert. The confirmation email is queued in the
+    same transaction.
+    """
+    with counting_rejections(), transaction.atomic():
+        slot = lock_slot(slot_id)
+        if slot.is_closed:
+            raise SlotClosedError('This slot is closed for booking.')
+        release_expired_holds(slot)
+
+        hold = Booking.objects.filter(user=user, slot=slot, status='pending').first()
+        if hold is None:
+            _check_capacity(slot, players)
+            booking = _insert_booking(user, slot, players=players, status='confirmed')
+        else:
+            _check_capacity(slot, players, held=hold.players)
+            hold.players = players
+            hold.status = 'confirmed'
+            hold.expires_at = None
+            hold.save(update_fields=['players', 'status', 'expires_at', 'updated_at'])
+            booking = hold
+        enqueue_booking_event(booking, 'booking_confirmed')
+        transaction.on_commit(metrics.BOOKINGS_CREATED.inc)
+    return booking
+
+
+def cancel_booking(booking):
+    """Cancel a confirmed booking and queue the cancellation email"""
+    with transaction.atomic():
+        booking.status = 'cancelled'
+        booking.save(update_fields=['status', 'updated_at'])
+        enqueue_booking_event(booking, 'booking_cancelled')
+        transaction.on_commit(metrics.BOOKINGS_CANCELLED.inc)
+    return booking
+
+
+def set_booking_status(booking_id, status):
+    """
+    Move a booking to `status` on an admin's behalf.
+
+    Reactivating a booking gets the same checks as a user booking: the
+    slot is locked, the booking's players must fit (its own spots count if
+    it already holds them) and the user can't end up with two active
+    bookings on the slot. A booking set to pending gets a fresh hold expiry.
+    Saved row by row, so the booking signals invalidate the caches.
+    """
+    with transaction.atomic():
+        slot_id = Booking.objects.values_list('slot_id', flat=True).get(pk=booking_id)
+        slot = lock_slot(slot_id)
+        booking = Booking.objects.select_for_update().get(pk=booking_id)
+        if status in ('confirmed', 'pending'):
+            holding = Booking.objects.holding_capacity().filter(pk=booking.pk).exists()
+            _check_capacity(slot, booking.players, held=booking.players if holding else 0)
+        booking.status = status
+        booking.expires_at = hold_expiry() if status == 'pending' else None
+        try:
+            with transaction.atomic():
+                booking.save(update_fields=['status', 'expires_at', 'updated_at'])
+        except IntegrityError:
+            raise AlreadyBookedError(f'{booking.user} already has an active booking on {slot}.')
+    return booking
+
+
+def reschedule_booking(user, booking_id, target_slot_id):
+    """
+    Move one of the user's confirmed bookings to another slot of the same
+    type at the same venue, keeping its player count. Refused where the
+    venue has no_reschedule set.
+
+    Both slot rows are locked in id order, so two users swapping slots in
+    opposite directions queue up instead of deadlocking. With both locked,
+    the booking is re-read and checked, and the target's capacity checked
+    once, before the booking's slot is changed in place. The user either
+    ends up on the new slot or keeps the old one; the spots are never
+    released in between.
+    """
+    with counting_rejections(), transaction.atomic():
+        source_slot_id = (
+            Booking.objects.filter(pk=booking_id, user=user).values_list('slot_id', flat=True).first()
+        )
+        if source_slot_id is None:
+            raise BookingError('Booking not found.')
+        if source_slot_id == target_slot_id:
+            raise BookingError('Your booking is already on this slot.')
+        slots = {slot_id: lock_slot(slot_id) for slot_id in sorted((source_slot_id, target_slot_id))}
+        source, target = slots[source_slot_id], slots[target_slot_id]
+        if source.venue.no_reschedule:
+            raise RescheduleNotAllowedError(f'{source.venue.name} does not allow rescheduling.')
+        if target.venue_id != source.venue_id:
+            raise BookingError(f'You can only move to another slot at {source.venue.name}.')
+
+        booking = Booking.objects.select_for_update().get(pk=booking_id)
+        if booking.slot_id != source_slot_id:
+            raise BookingError('This booking was changed in the meantime. Please try again.')
+        if booking.status != 'confirmed':
+            raise BookingError('Only confirmed bookings can be rescheduled.')
+        today = timezone.localdate()
+        if source.date < today:
+            raise BookingError('Past bookings cannot be rescheduled.')
+        if target.date < today:
+            raise SlotClosedError('You can only move to an upcoming slot.')
+        if target.cricket_type != source.cricket_type:
+            raise BookingError(f'You can only move to another {source.get_cricket_type_display()} slot.')
+        if target.is_closed:
+            raise SlotClosedError('This slot is closed for booking.')
+        release_expired_holds(target)
+
+        # A hold of the user's own on the target is folded into the move
+        hold = Booking.objects.filter(user=user, slot=target, status='pending').first()
+        _check_capacity(target, booking.players, held=hold.players if hold else 0)
+        if hold is not None:
+            hold.delete()
+        booking.slot = target
+        try:
+            with transaction.atomic():
+                booking.save(update_fields=['slot', 'updated_at'])
+        except IntegrityError:
+            raise AlreadyBookedError(
+                f'You have already booked this slot ({target.get_cricket_type_display()} '
+                f'on {target.date} {target.get_time_slot_display()})'
+            )
+        enqueue_booking_event(booking, 'booking_rescheduled', previous_slot=source)
+        transaction.on_commit(metrics.BOOKINGS_RESCHEDULED.inc)
+    return booking
@@ -0,0 +1,52 @@
+"""
+Signal handlers for Cricket Slot Booking System
+"""
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import slow_queries
+from .cache import invalidate_availability, invalidate_history
+from .models import Booking, Slot, Venue
+
+
+def slot_of(instance):
+    """(venue id, date) of a slot or a booking's slot; (None, None) if the slot is gone"""
+    if isinstance(instance, Slot):
+        return instance.venue_id, instance.date
+    slot_field = Booking._meta.get_field('slot')
+    if slot_field.is_cached(instance):
+        return instance.slot.venue_id, instance.slot.date
+    return Slot.objects.filter(pk=instance.slot_id).values_list('venue_id', 'date').first() or (None, None)
+
+
+@receiver([post_save, post_delete], sender=Slot)
+@receiver([post_save, post_delete], sender=Booking)
+def slot_or_booking_changed(sender, instance, **kwargs):
+    """
+    Saving or deleting a slot or booking changes its venue's availability.
+    Holds are left out: every view of the booking page takes or extends one,
+    and flushing the cached listings for each would defeat the cache. Cached
+    spot counts may miss a hold until they expire; capacity is always
+    re-checked with the slot locked. Slot edits and booking changes on past
+    slots also change the cached history.
+    """
+    if sender is Booking and instance.status == 'pending':
+        return
+    venue_id, date = slot_of(instance)
+    invalidate_availability(venue_id)
+    if sender is Slot or date is None or date < timezone.localdate():
+        invalidate_history()
+
+
+@receiver([post_save, post_delete], sender=Venue)
+def venue_changed(sender, **kwargs):
+    """Venue names and the venue list appear on every venue's pages"""
+    invalidate_availability()
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    """Time queries on the default connection for the slow-query log"""
+    slow_queries.attach(connection)
@@ -0,0 +1,177 @@
+"""
+Slow-query log for Cricket Slot Booking System
+
+An execute wrapper on the `default` connection times every query. Queries
+slower than SLOW_QUERY_MS are appended to SLOW_QUERY_LOG as one JSON line
+each: SQL, parameter types, the project code (and template line) that ran
+it, a normalized fingerprint and the database's EXPLAIN plan for SELECTs
+(EXPLAIN ANALYZE with SLOW_QUERY_EXPLAIN_ANALYZE). `manage.py slow_queries`
+aggregates the log by fingerprint.
+
+Parameter values can be personal data, so only their types are logged
+unless SLOW_QUERY_LOG_PARAMS is set. Queries on the user and session
+tables never log values or plans (plans can show the bound values).
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+
+_state = threading.local()
+_write_lock = threading.Lock()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*(?:\?\s*,\s*)*\?\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+# Not WITH: a data-modifying CTE would run again under EXPLAIN ANALYZE
+_SELECT = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+_SENSITIVE_TABLE = re.compile(r'\b(auth_user|django_session)\b', re.IGNORECASE)
+
+
+def get_threshold():
+    """Seconds; 0 disables the log"""
+    return getattr(settings, 'SLOW_QUERY_MS', 0) / 1000
+
+
+def normalize(sql):
+    """SQL with literals and placeholders replaced by ?, for grouping"""
+    sql = sql.replace('%s', '?')
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:12]
+
+
+def find_caller():
+    """
+    (code location, template location) of the project code that ran the
+    query; either may be None
+    """
+    base_dir = str(settings.BASE_DIR)
+    caller = template = None
+    # Skip the execute wrappers themselves (this module, MetricsMiddleware's counter)
+    past_wrappers = False
+    frame = sys._getframe(2)
+    while frame is not None and (caller is None or template is None):
+        code = frame.f_code
+        filename = code.co_filename
+        if code.co_name == '_execute_with_wrappers':
+            past_wrappers = True
+        elif (
+            past_wrappers
+            and caller is None
+            and filename.startswith(base_dir)
+            and 'site-packages' not in filename
+        ):
+            caller = f'{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {code.co_name}'
+        if template is None and code.co_name == 'render_annotated':
+            # django.template.base.Node.render_annotated: the innermost tag being rendered
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                template = f'{origin.template_name}:{token.lineno}'
+        frame = frame.f_back
+    return caller, template
+
+
+def explain(connection, sql, params):
+    """The database's plan for a SELECT, or None"""
+    if not _SELECT.match(sql):
+        return None
+    options = {'analyze': True} if getattr(settings, 'SLOW_QUERY_EXPLAIN_ANALYZE', False) else {}
+    try:
+        prefix = connection.ops.explain_query_prefix(**options)
+    except ValueError:
+        # Backend doesn't support ANALYZE (e.g. SQLite)
+        prefix = connection.ops.explain_query_prefix()
+    try:
+        # Savepoint, so a failed EXPLAIN can't break the caller's transaction
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return '\n'.join(' '.join(str(value) for value in row) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f'EXPLAIN failed: {exc}'
+
+
+def write_entry(entry):
+    path = Path(settings.SLOW_QUERY_LOG)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(entry, default=str) + '\n'
+    with _write_lock, open(path, 'a', encoding='utf-8') as handle:
+        handle.write(line)
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """connection.execute_wrapper hook; see attach()"""
+    if getattr(_state, 'active', False):
+        # The EXPLAIN itself
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - start
+    threshold = get_threshold()
+    if threshold and duration >= threshold:
+        _state.active = True
+        try:
+            record(context['connection'], sql, params, many, duration)
+        finally:
+            _state.active = False
+    return result
+
+
+def is_sensitive(sql):
+    """Whether a query touches tables holding password hashes, emails or sessions"""
+    return bool(_SENSITIVE_TABLE.search(sql))
+
+
+def loggable_params(sql, params):
+    """Parameters as they may appear in the log: values, or just their type names"""
+    if params is None:
+        return None
+    if getattr(settings, 'SLOW_QUERY_LOG_PARAMS', False) and not is_sensitive(sql):
+        return params
+    if isinstance(params, dict):
+        return {name: type(value).__name__ for name, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def record(connection, sql, params, many, duration):
+    normalized = normalize(sql)
+    caller, template = find_caller()
+    write_entry({
+        'time': timezone.now().isoformat(),
+        'duration_ms': round(duration * 1000, 2),
+        'alias': connection.alias,
+        'sql': sql,
+        'params': None if many else loggable_params(sql, params),
+        'fingerprint': fingerprint(normalized),
+        'normalized': normalized,
+        'caller': caller,
+        'template': template,
+        'explain': None if many or is_sensitive(sql) else explain(connection, sql, params),
+    })
+
+
+def attach(connection):
+    """Install the hook on a new `default` connection if the log is enabled"""
+    if connection.alias == 'default' and get_threshold():
+        if log_slow_queries not in connection.execute_wrappers:
+            # First (outermost), not appended: connection.execute_wrapper()
+            # blocks that are open while the connection is created pop the
+            # last wrapper when they exit
+            connection.execute_wrappers.insert(0, log_slow_queries)
@@ -0,0 +1,21 @@
+"""
+Template tags for idempotent form submissions
+
+    {% load idempotency %}
+    <form method="POST">{% csrf_token %}{% idempotency_field %} ...</form>
+"""
+import uuid
+
+from django import template
+from django.utils.html import format_html
+
+from slots.idempotency import FIELD_NAME
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_field():
+    """Hidden input with a fresh token; resubmitting the same form reuses it"""
+    return format_html('<input type="hidden" name="{}" value="{}">', FIELD_NAME, uuid.uuid4().hex)
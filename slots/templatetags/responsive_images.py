@@ -0,0 +1,51 @@
+"""
+Template tags for responsive images
+
+    {% load responsive_images %}
+    {% responsive_image 'images/DKSA_style_4.png' alt='Venue' sizes='(min-width: 992px) 50vw, 100vw' class='img-fluid' %}
+"""
+from django import template
+from django.conf import settings
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from slots.images import read_manifest
+
+
+register = template.Library()
+
+
+def _srcset(variants):
+    prefix = settings.RESPONSIVE_IMAGE_STATIC_PREFIX
+    return ', '.join(f"{static(prefix + variant['path'])} {variant['width']}w" for variant in variants)
+
+
+@register.simple_tag
+def responsive_image(path, alt='', sizes='100vw', **attrs):
+    """
+    Render a <picture> with a WebP source and a resized fallback srcset.
+    Falls back to a plain <img> if build_responsive_images hasn't been run.
+    """
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    entry = read_manifest().get(path)
+    if not entry:
+        return format_html('<img src="{}" alt="{}"{}>', static(path), alt, flatatt(attrs))
+
+    fallback = entry['variants']['fallback']
+    attrs.setdefault('width', entry['width'])
+    attrs.setdefault('height', entry['height'])
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{}>'
+        '</picture>',
+        _srcset(entry['variants']['webp']),
+        sizes,
+        static(settings.RESPONSIVE_IMAGE_STATIC_PREFIX + fallback[-1]['path']),
+        _srcset(fallback),
+        sizes,
+        alt,
+        flatatt(attrs),
+    )
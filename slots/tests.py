@@ -0,0 +1,994 @@
+"""
+Tests for Cricket Slot Booking System
+"""
+import csv
+import io
+import tempfile
+import threading
+import unittest
+from datetime import date, timedelta
+from importlib import import_module
+from pathlib import Path
+from unittest import mock
+
+from django.apps import apps
+from django.contrib import admin
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, OperationalError, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import calendar, notifications, profiling, services, slow_queries, storage
+from .admin import BookingAdmin
+from .cache import availability_version
+from .reports import get_report
+from .search import parse_date_term
+from .forms import RegisterForm, SlotSearchForm
+from .importers import import_slots
+from .idempotency import FIELD_NAME
+from .models import ArchivedBooking, Booking, IdempotencyRecord, OutboxMessage, Slot, Venue
+
+
+class RescheduleBookingTests(TestCase):
+    """The rule checks of services.reschedule_booking, run one at a time"""
+
+    def setUp(self):
+        self.venue = Venue.objects.create(name='Test Ground', no_reschedule=False)
+        self.user = User.objects.create_user('captain', password='x')
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.source = self.make_slot('6-7')
+        self.target = self.make_slot('7-8')
+        self.booking = Booking.objects.create(user=self.user, slot=self.source, players=4)
+
+    def make_slot(self, time_slot, venue=None, cricket_type='box', max_players=6):
+        return Slot.objects.create(
+            venue=venue or self.venue,
+            date=self.date,
+            time_slot=time_slot,
+            cricket_type=cricket_type,
+            max_players=max_players,
+        )
+
+    def test_moves_booking(self):
+        booking = services.reschedule_booking(self.user, self.booking.pk, self.target.pk)
+        self.assertEqual(booking.slot_id, self.target.pk)
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).slot_id, self.target.pk)
+
+    def test_venue_without_rescheduling(self):
+        self.venue.no_reschedule = True
+        self.venue.save()
+        with self.assertRaises(services.RescheduleNotAllowedError):
+            services.reschedule_booking(self.user, self.booking.pk, self.target.pk)
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).slot_id, self.source.pk)
+
+    def test_other_venue(self):
+        other = self.make_slot('7-8', venue=Venue.objects.create(name='Other Ground', no_reschedule=False))
+        with self.assertRaisesMessage(services.BookingError, 'at Test Ground'):
+            services.reschedule_booking(self.user, self.booking.pk, other.pk)
+
+    def test_other_cricket_type(self):
+        other = self.make_slot('7-8', cricket_type='normal', max_players=11)
+        with self.assertRaisesMessage(services.BookingError, 'another Box Cricket slot'):
+            services.reschedule_booking(self.user, self.booking.pk, other.pk)
+
+    def test_target_held_by_someone_else(self):
+        Booking.objects.create(
+            user=User.objects.create_user('other', password='x'),
+            slot=self.target,
+            players=3,
+            status='pending',
+            expires_at=services.hold_expiry(),
+        )
+        with self.assertRaises(services.SlotFullError):
+            services.reschedule_booking(self.user, self.booking.pk, self.target.pk)
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).slot_id, self.source.pk)
+
+    def test_own_hold_on_target_is_folded_in(self):
+        Booking.objects.create(
+            user=User.objects.create_user('other', password='x'),
+            slot=self.target,
+            players=2,
+        )
+        hold = Booking.objects.create(
+            user=self.user,
+            slot=self.target,
+            players=2,
+            status='pending',
+            expires_at=services.hold_expiry(),
+        )
+        services.reschedule_booking(self.user, self.booking.pk, self.target.pk)
+        self.assertFalse(Booking.objects.filter(pk=hold.pk).exists())
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).slot_id, self.target.pk)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'needs row locks (SELECT ... FOR UPDATE)')
+class ConcurrentRescheduleTests(TransactionTestCase):
+    """Opposing swaps lock both slots through lock_slot in the same order"""
+
+    ROUNDS = 20
+
+    def setUp(self):
+        venue = Venue.objects.create(name='Test Ground', no_reschedule=False)
+        date = timezone.localdate() + timedelta(days=1)
+        self.slot_a = Slot.objects.create(venue=venue, date=date, time_slot='6-7', cricket_type='box', max_players=6)
+        self.slot_b = Slot.objects.create(venue=venue, date=date, time_slot='7-8', cricket_type='box', max_players=6)
+        self.user_a = User.objects.create_user('captain_a', password='x')
+        self.user_b = User.objects.create_user('captain_b', password='x')
+        self.filler = User.objects.create_user('regulars', password='x')
+
+    def swap(self, user, booking_id, target_slot_id, barrier, errors):
+        try:
+            barrier.wait()
+            services.reschedule_booking(user, booking_id, target_slot_id)
+        except services.BookingError:
+            pass  # losing the race for the last spots is fine
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def assert_within_capacity(self):
+        for slot in (self.slot_a, self.slot_b):
+            players = Booking.objects.filter(slot=slot).holding_capacity().aggregate(total=Sum('players'))['total']
+            self.assertLessEqual(players or 0, slot.max_players)
+
+    def test_opposing_swaps(self):
+        for _ in range(self.ROUNDS):
+            Booking.objects.all().delete()
+            # 5 of 6 spots taken on each slot: a group of 3 only fits on the
+            # other slot once the group there has left it
+            booking_a = Booking.objects.create(user=self.user_a, slot=self.slot_a, players=3)
+            booking_b = Booking.objects.create(user=self.user_b, slot=self.slot_b, players=3)
+            Booking.objects.create(user=self.filler, slot=self.slot_a, players=2)
+            Booking.objects.create(user=self.filler, slot=self.slot_b, players=2)
+            barrier = threading.Barrier(2)
+            errors = []
+            threads = [
+                threading.Thread(target=self.swap, args=(self.user_a, booking_a.pk, self.slot_b.pk, barrier, errors)),
+                threading.Thread(target=self.swap, args=(self.user_b, booking_b.pk, self.slot_a.pk, barrier, errors)),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertFalse(
+                [exc for exc in errors if isinstance(exc, OperationalError)],
+                'a swap deadlocked',
+            )
+            self.assertEqual(errors, [])
+            self.assert_within_capacity()
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class IdempotentBookingTests(TestCase):
+    """POSTs carrying an idempotency key run once and replay afterwards"""
+
+    def setUp(self):
+        cache.clear()  # outcomes are cached by user and path, which repeat across tests
+        venue = Venue.objects.create(name='Test Ground')
+        self.slot = Slot.objects.create(
+            venue=venue,
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot='6-7',
+            cricket_type='box',
+            max_players=6,
+        )
+        self.user = User.objects.create_user('captain', password='x')
+        self.client.force_login(self.user)
+        self.url = reverse('slots:book_slot', args=[self.slot.pk])
+
+    def post(self, token, players=2):
+        return self.client.post(self.url, {'players': players, FIELD_NAME: token})
+
+    def test_replay_returns_first_outcome(self):
+        first = self.post('token-1')
+        # Reading the flashed messages for the record mustn't consume them
+        self.assertContains(self.client.get(first['Location']), 'Booking Confirmed')
+        second = self.post('token-1')
+        self.assertRedirects(first, reverse('slots:my_bookings'), fetch_redirect_response=False)
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertEqual(Booking.objects.filter(slot=self.slot).count(), 1)
+        self.assertEqual(IdempotencyRecord.objects.get().status_code, 302)
+
+    def test_expired_record_is_replaced(self):
+        self.post('token-1')
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        cache.clear()  # the cached outcome expires with the record
+        Booking.objects.all().delete()
+        response = self.post('token-1')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Booking.objects.filter(slot=self.slot, status='confirmed').count(), 1)
+        self.assertEqual(IdempotencyRecord.objects.count(), 1)
+
+    def test_form_errors_are_not_recorded(self):
+        response = self.post('token-1', players=0)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+
+@override_settings(VENUE_TIME_ZONE='Asia/Kolkata')
+class CalendarFeedTests(TestCase):
+    """Events keep the venue's wall-clock times"""
+
+    def test_times_are_venue_local(self):
+        user = User.objects.create_user('captain', password='x')
+        slot = Slot.objects.create(
+            venue=Venue.objects.create(name='Test Ground'),
+            date=calendar.venue_today() + timedelta(days=1),
+            time_slot='6-7pm',
+            cricket_type='box',
+        )
+        Booking.objects.create(user=user, slot=slot)
+        feed = ''.join(calendar.iter_feed(user.pk))
+        self.assertIn(f'DTSTART:{slot.date:%Y%m%d}T180000\r\n', feed)
+        self.assertIn(f'DTEND:{slot.date:%Y%m%d}T190000\r\n', feed)
+        self.assertIn('X-WR-TIMEZONE:Asia/Kolkata\r\n', feed)
+
+
+class RegisterFormTests(TestCase):
+    """Case-insensitive duplicates are caught by the unique indexes from migration 0003"""
+
+    def setUp(self):
+        User.objects.create_user('Captain', email='captain@example.com', password='x')
+
+    def register(self, username, email):
+        form = RegisterForm({
+            'username': username,
+            'email': email,
+            'password1': 'a-long-password',
+            'password2': 'a-long-password',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def test_duplicate_email(self):
+        form = self.register('someone', 'CAPTAIN@example.com')
+        self.assertIsNone(form.save())
+        self.assertEqual(list(form.errors), ['email'])
+
+    def test_duplicate_username(self):
+        form = self.register('captain', 'someone@example.com')
+        self.assertIsNone(form.save())
+        self.assertEqual(list(form.errors), ['username'])
+
+
+class CaseInsensitiveUserMigrationTests(TestCase):
+    """Migration 0003 lists clashing users instead of failing on the index"""
+
+    def check_duplicates(self):
+        migration = import_module('slots.migrations.0003_auth_user_case_insensitive_unique')
+        migration.check_duplicates(apps, None)
+
+    def test_clashing_users_are_listed(self):
+        with connection.cursor() as cursor:
+            # The index would reject these, so drop it for the test transaction
+            cursor.execute('DROP INDEX slots_auth_user_email_ci_uniq')
+        User.objects.create_user('first', email='Same@example.com')
+        User.objects.create_user('second', email='same@example.com')
+        User.objects.create_user('third', email='')
+        User.objects.create_user('fourth', email='')
+        with self.assertRaisesMessage(RuntimeError, "email 'same@example.com': first (id"):
+            self.check_duplicates()
+
+    def test_no_clashes(self):
+        User.objects.create_user('first', email='first@example.com')
+        self.check_duplicates()
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class BookingHoldTests(TestCase):
+    """Opening the booking page holds the group's spots"""
+
+    def setUp(self):
+        self.venue = Venue.objects.create(name='Test Ground')
+        self.slot = Slot.objects.create(
+            venue=self.venue,
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot='6-7',
+            cricket_type='box',
+            max_players=6,
+        )
+        self.user = User.objects.create_user('captain', password='x')
+        self.client.force_login(self.user)
+        self.url = reverse('slots:book_slot', args=[self.slot.pk])
+
+    def test_holds_requested_players(self):
+        self.client.get(self.url, {'players': 4})
+        self.assertEqual(Booking.objects.get(user=self.user).players, 4)
+        self.client.get(self.url, {'players': 2})
+        hold = Booking.objects.get(user=self.user)
+        self.assertEqual((hold.status, hold.players), ('pending', 2))
+
+    def test_hold_leaves_cached_availability(self):
+        version = availability_version(self.venue.pk)
+        self.client.get(self.url, {'players': 3})
+        self.assertEqual(availability_version(self.venue.pk), version)
+        services.create_booking(self.user, self.slot.pk, 3)
+        self.assertNotEqual(availability_version(self.venue.pk), version)
+
+
+class ReportCacheTests(TestCase):
+    """Past-date reports survive booking traffic; slot edits and admin actions refresh them"""
+
+    def setUp(self):
+        cache.clear()
+        self.venue = Venue.objects.create(name='Test Ground')
+        self.yesterday = timezone.localdate() - timedelta(days=1)
+        self.slot = Slot.objects.create(
+            venue=self.venue, date=self.yesterday, time_slot='6-7', cricket_type='box', max_players=6,
+        )
+        Slot.objects.create(
+            venue=self.venue,
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot='6-7',
+            cricket_type='box',
+        )
+
+    def test_past_report_kept_across_bookings(self):
+        get_report(self.yesterday, self.yesterday, 'day')
+        services.create_booking(
+            User.objects.create_user('captain', password='x'), Slot.objects.latest('date').pk, 2,
+        )
+        with self.assertNumQueries(0):
+            get_report(self.yesterday, self.yesterday, 'day')
+
+    def test_past_report_refreshed_by_slot_edit(self):
+        self.assertEqual(get_report(self.yesterday, self.yesterday, 'day').total.capacity, 6)
+        self.slot.max_players = 8
+        self.slot.save()
+        self.assertEqual(get_report(self.yesterday, self.yesterday, 'day').total.capacity, 8)
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_past_report_refreshed_by_admin_actions(self):
+        booking = Booking.objects.create(
+            user=User.objects.create_user('captain', password='x'), slot=self.slot, players=2, status='confirmed',
+        )
+        self.assertEqual(get_report(self.yesterday, self.yesterday, 'day').total.confirmed, 1)
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        self.client.post(
+            reverse('admin:slots_booking_changelist'),
+            {'action': 'mark_cancelled', '_selected_action': [booking.pk]},
+        )
+        self.assertEqual(get_report(self.yesterday, self.yesterday, 'day').total.cancelled, 1)
+
+
+class ImportSlotsTests(TestCase):
+    """CSV import errors are reported per row, or save nothing"""
+
+    def setUp(self):
+        self.venue = Venue.objects.create(name='Test Ground')
+
+    def test_malformed_line_is_a_row_error(self):
+        too_long = '"' + 'x' * (csv.field_size_limit() + 1) + '"'
+        stream = io.StringIO(f'date,time_slot,cricket_type\n2030-01-01,6-7,box\n{too_long},7-8,box\n2030-01-02,6-7,box\n')
+        result = import_slots(stream, venue=self.venue)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.error_count, 1)
+        self.assertEqual(result.errors[0][0], 3)
+        self.assertIn('malformed CSV', result.errors[0][1])
+
+    def test_unreadable_file_saves_nothing(self):
+        rows = ''.join(f'2030-01-{day:02d},6-7,box\n' for day in range(1, 11))
+        raw = io.BytesIO(f'date,time_slot,cricket_type\n{rows}'.encode() + b'2030-02-01,6-7,\xff\n')
+        with self.assertRaises(ValueError):
+            import_slots(io.TextIOWrapper(raw, encoding='utf-8'), venue=self.venue, batch_size=2)
+        self.assertFalse(Slot.objects.filter(venue=self.venue).exists())
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class MetricsViewTests(TestCase):
+    """/metrics is never public in production"""
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_no_token_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('slots:metrics')).status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required(self):
+        url = reverse('slots:metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+
+@override_settings(
+    PROFILING_SAMPLE_RATE=1.0,
+    PROFILING_DIR=tempfile.mkdtemp(),
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class ProfilingMiddlewareTests(TestCase):
+    """Sampled profiles stay internal and never fail the request"""
+
+    def test_profile_name_only_for_token_holders(self):
+        url = reverse('slots:venue')
+        self.assertNotIn('X-Profile', self.client.get(url))
+        response = self.client.get(url, HTTP_X_PROFILE_TOKEN=profiling.make_token())
+        self.assertIn('X-Profile', response)
+
+    def test_save_error_is_logged(self):
+        with mock.patch.object(profiling.Profile, 'save', side_effect=FileNotFoundError), \
+                self.assertLogs('slots.middleware', 'ERROR'):
+            response = self.client.get(reverse('slots:venue'))
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class CacheHeaderTests(TestCase):
+    """Public pages stay public on revalidation; logged-in and personal pages stay out of shared caches"""
+
+    def setUp(self):
+        Venue.objects.create(name='Test Ground')
+
+    def test_not_modified_keeps_public_policy(self):
+        url = reverse('slots:venue')
+        first = self.client.get(url)
+        self.assertIn('public', first['Cache-Control'])
+        revalidated = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['Cache-Control'], first['Cache-Control'])
+
+    def test_logged_in_pages_are_private(self):
+        self.client.force_login(User.objects.create_user('captain', password='x'))
+        self.assertIn('private', self.client.get(reverse('slots:venue'))['Cache-Control'])
+
+    def test_personal_pages_are_never_stored(self):
+        self.client.force_login(User.objects.create_user('captain', password='x'))
+        response = self.client.get(reverse('slots:my_bookings'))
+        for directive in ('private', 'no-store', 'max-age=0'):
+            self.assertIn(directive, response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class BookingAdminActionTests(TestCase):
+    """Admin status actions keep the booking rules and refresh the caches"""
+
+    def setUp(self):
+        self.venue = Venue.objects.create(name='Test Ground')
+        self.slot = Slot.objects.create(
+            venue=self.venue,
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot='6-7',
+            cricket_type='box',
+            max_players=4,
+        )
+        self.captain = User.objects.create_user('captain', password='x')
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+
+    def run_action(self, action, *bookings):
+        return self.client.post(
+            reverse('admin:slots_booking_changelist'),
+            {'action': action, '_selected_action': [b.pk for b in bookings]},
+            follow=True,
+        )
+
+    def test_reconfirm_duplicate_is_skipped(self):
+        cancelled = Booking.objects.create(user=self.captain, slot=self.slot, players=1, status='cancelled')
+        Booking.objects.create(user=self.captain, slot=self.slot, players=1, status='confirmed')
+        response = self.run_action('mark_confirmed', cancelled)
+        self.assertEqual(response.status_code, 200)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+        self.assertContains(response, f'Booking #{cancelled.pk} skipped')
+
+    def test_reconfirm_over_capacity_is_skipped(self):
+        other = User.objects.create_user('other', password='x')
+        Booking.objects.create(user=other, slot=self.slot, players=3, status='confirmed')
+        cancelled = Booking.objects.create(user=self.captain, slot=self.slot, players=2, status='cancelled')
+        self.run_action('mark_confirmed', cancelled)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+
+    def test_status_change_invalidates_availability(self):
+        booking = Booking.objects.create(user=self.captain, slot=self.slot, players=2, status='confirmed')
+        version = availability_version(self.venue.pk)
+        self.run_action('mark_pending', booking)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'pending')
+        self.assertIsNotNone(booking.expires_at)
+        self.assertNotEqual(availability_version(self.venue.pk), version)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class VenueScopingTests(TestCase):
+    """/v/<slug>/ pages, search and reports only see their own venue's slots"""
+
+    def setUp(self):
+        cache.clear()
+        self.tomorrow = timezone.localdate() + timedelta(days=1)
+        self.north = Venue.objects.create(name='North Ground')
+        self.south = Venue.objects.create(name='South Ground')
+        self.north_slot = Slot.objects.create(
+            venue=self.north, date=self.tomorrow, time_slot='6-7', cricket_type='box', max_players=6,
+        )
+        self.south_slot = Slot.objects.create(
+            venue=self.south, date=self.tomorrow, time_slot='6-7', cricket_type='box', max_players=6,
+        )
+
+    def dashboard_slots(self, venue, **params):
+        url = reverse('slots:venue_dashboard', args=[venue.slug])
+        return list(self.client.get(url, params).context['slots'])
+
+    def test_routes_by_slug(self):
+        response = self.client.get(reverse('slots:venue_dashboard', args=[self.south.slug]))
+        self.assertEqual(response.context['venue'], self.south)
+        self.assertEqual(self.client.get('/v/no-such-ground/').status_code, 404)
+
+    def test_availability_is_per_venue(self):
+        self.assertEqual(self.dashboard_slots(self.north), [self.north_slot])
+        self.assertEqual(self.dashboard_slots(self.south), [self.south_slot])
+
+    def test_search_is_per_venue(self):
+        found = self.dashboard_slots(self.south, cricket_type='box', date_from=self.tomorrow.isoformat())
+        self.assertEqual(found, [self.south_slot])
+        self.assertEqual(self.dashboard_slots(self.south, next=''), [self.south_slot])
+
+    def test_report_is_per_venue(self):
+        Booking.objects.create(
+            user=User.objects.create_user('captain', password='x'),
+            slot=self.north_slot, players=4, status='confirmed',
+        )
+        north = get_report(self.tomorrow, self.tomorrow, 'day', self.north)
+        south = get_report(self.tomorrow, self.tomorrow, 'day', self.south)
+        everywhere = get_report(self.tomorrow, self.tomorrow, 'day')
+        self.assertEqual((north.total.slots, north.total.players), (1, 4))
+        self.assertEqual((south.total.slots, south.total.players), (1, 0))
+        self.assertEqual((everywhere.total.slots, everywhere.total.players), (2, 4))
+
+    def test_booking_error_returns_to_slot_venue(self):
+        self.south_slot.is_closed = True
+        self.south_slot.save()
+        self.client.force_login(User.objects.create_user('captain', password='x'))
+        response = self.client.get(reverse('slots:book_slot', args=[self.south_slot.pk]))
+        self.assertRedirects(response, reverse('slots:venue_dashboard', args=[self.south.slug]))
+
+
+class OutboxTests(TestCase):
+    """Notifications commit with their booking and are delivered once, with retries"""
+
+    def setUp(self):
+        self.venue = Venue.objects.create(name='Test Ground')
+        self.slot = Slot.objects.create(
+            venue=self.venue,
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot='6-7',
+            cricket_type='box',
+            max_players=6,
+        )
+        self.user = User.objects.create_user('captain', email='captain@example.com', password='x')
+
+    def queue_message(self):
+        services.create_booking(self.user, self.slot.pk)
+        return OutboxMessage.objects.get()
+
+    def test_booking_and_message_commit_together(self):
+        message = self.queue_message()
+        self.assertEqual(message.booking, Booking.objects.get())
+        self.assertEqual(message.event, 'booking_confirmed')
+
+    def test_booking_and_message_roll_back_together(self):
+        with mock.patch.object(OutboxMessage.objects, 'create', side_effect=DatabaseError('outbox down')):
+            with self.assertRaises(DatabaseError):
+                services.create_booking(self.user, self.slot.pk)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_claimed_batch_is_sent_once(self):
+        self.queue_message()
+        batch = notifications.claim_batch(10, lease_seconds=300)
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(notifications.claim_batch(10, lease_seconds=300), [])
+        self.assertTrue(notifications.process(batch[0], 5, 30, 3600))
+        self.assertEqual(notifications.claim_batch(10, lease_seconds=300), [])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutboxMessage.objects.get().status, 'sent')
+
+    def test_failed_send_backs_off(self):
+        self.queue_message()
+        with mock.patch.object(notifications, 'deliver', side_effect=OSError('smtp down')), \
+                self.assertLogs(notifications.logger, 'WARNING'):
+            before = timezone.now()
+            self.assertFalse(notifications.process(notifications.claim_batch(10, 300)[0], 5, 30, 3600))
+            message = OutboxMessage.objects.get()
+            self.assertEqual((message.status, message.attempts), ('pending', 1))
+            self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=30))
+            self.assertIsNone(message.locked_until)
+            # Not due again until the backoff passes
+            self.assertEqual(notifications.claim_batch(10, 300), [])
+            notifications.process(message, 5, 30, 3600)
+            message.refresh_from_db()
+            self.assertGreaterEqual(message.next_attempt_at, timezone.now() + timedelta(seconds=59))
+
+    def test_failed_after_max_attempts(self):
+        message = self.queue_message()
+        with mock.patch.object(notifications, 'deliver', side_effect=OSError('smtp down')), \
+                self.assertLogs(notifications.logger, 'WARNING'):
+            for _ in range(3):
+                notifications.process(message, 3, 30, 3600)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), ('failed', 3, 'smtp down'))
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(notifications.claim_batch(10, 300), [])
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ArchiveBookingsTests(TestCase):
+    """Archiving moves past slots out of the hot tables without losing history"""
+
+    def setUp(self):
+        self.venue = Venue.objects.create(name='Test Ground')
+        self.user = User.objects.create_user('captain', email='captain@example.com', password='x')
+        last_week = timezone.localdate() - timedelta(days=7)
+        for time_slot in ('6-7', '7-8', '8-9'):
+            slot = Slot.objects.create(
+                venue=self.venue, date=last_week, time_slot=time_slot, cricket_type='box', max_players=6,
+            )
+            self.booking = services.create_booking(self.user, slot.pk, 2)
+
+    def archive(self):
+        call_command('archive_bookings', batch_size=2, stdout=io.StringIO())
+
+    def test_moves_rows_in_batches(self):
+        self.archive()
+        self.assertFalse(Slot.objects.exists())
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(ArchivedBooking.objects.filter(user=self.user).count(), 3)
+        # Queued notifications outlive their booking
+        self.assertEqual(OutboxMessage.objects.filter(booking__isnull=True).count(), 3)
+
+    def test_invalidates_once_per_batch(self):
+        with mock.patch('slots.management.commands.archive_bookings.invalidate_history') as history, \
+                mock.patch('slots.signals.invalidate_history') as per_row:
+            self.archive()
+        self.assertEqual(history.call_count, 2)
+        per_row.assert_not_called()
+
+    def test_history_shows_archived_bookings(self):
+        self.archive()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('slots:booking_history'))
+        self.assertEqual(response.context['total_bookings'], 3)
+        self.assertEqual(
+            [booking.pk for booking in response.context['confirmed_bookings']],
+            list(ArchivedBooking.objects.order_by('-created_at').values_list('pk', flat=True)),
+        )
+
+
+class SlowQueryLogTests(TestCase):
+    """The slow-query log is opt-in and keeps parameter values out"""
+
+    def setUp(self):
+        log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(log_dir.cleanup)
+        self.log_path = f'{log_dir.name}/slow.jsonl'
+
+    def test_off_by_default(self):
+        with override_settings():
+            del settings.SLOW_QUERY_MS
+            self.assertEqual(slow_queries.get_threshold(), 0)
+            new_connection = mock.Mock(alias='default', execute_wrappers=[])
+            slow_queries.attach(new_connection)
+            self.assertEqual(new_connection.execute_wrappers, [])
+
+    def test_params_logged_as_types(self):
+        sql = 'SELECT id FROM slots_venue WHERE name = %s'
+        with override_settings(SLOW_QUERY_LOG=self.log_path, SLOW_QUERY_LOG_PARAMS=False):
+            slow_queries.record(connection, sql, ['Secret Ground'], False, 1.0)
+        with open(self.log_path) as log:
+            entry = log.read()
+        self.assertNotIn('Secret Ground', entry)
+        self.assertIn('"params": ["str"]', entry)
+
+    def test_user_table_params_never_logged(self):
+        with override_settings(SLOW_QUERY_LOG_PARAMS=True):
+            self.assertEqual(
+                slow_queries.loggable_params('SELECT id FROM auth_user WHERE email = %s', ['a@example.com']),
+                ['str'],
+            )
+            self.assertEqual(slow_queries.loggable_params('SELECT id FROM slots_slot WHERE id = %s', [7]), [7])
+
+    def test_only_plain_selects_are_explained(self):
+        self.assertIsNone(slow_queries.explain(connection, 'WITH gone AS (DELETE FROM slots_venue) SELECT 1', []))
+        self.assertIsNotNone(slow_queries.explain(connection, 'SELECT id FROM slots_venue', []))
+
+
+class PurgeSessionsTests(TestCase):
+    """Expired sessions go in batches; live ones stay"""
+
+    def test_deletes_expired_in_batches(self):
+        now = timezone.now()
+        for n in range(5):
+            Session.objects.create(session_key=f'expired{n}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+        out = io.StringIO()
+        call_command('purge_sessions', batch_size=2, stdout=out)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+        self.assertEqual(out.getvalue().count('expired session(s)...'), 3)
+        self.assertIn('Purged 5 expired session(s)', out.getvalue())
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AdminListFilterTests(TestCase):
+    """Bounded admin filters: exact username, date range and cached per-venue facet counts"""
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.north = Venue.objects.create(name='North Ground')
+        self.south = Venue.objects.create(name='South Ground')
+        self.captain = User.objects.create_user('captain', password='x')
+        self.other = User.objects.create_user('captain2', password='x')
+        self.bookings = {}
+        for days, venue, user in ((1, self.north, self.captain), (5, self.south, self.other)):
+            slot = Slot.objects.create(
+                venue=venue, date=self.today + timedelta(days=days), time_slot='6-7', cricket_type='box',
+            )
+            self.bookings[user.username] = Booking.objects.create(user=user, slot=slot, status='confirmed')
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:slots_booking_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def results(self, **params):
+        return list(self.changelist(**params).context['cl'].result_list)
+
+    def test_username_filter_is_exact(self):
+        self.assertEqual(self.results(username='captain'), [self.bookings['captain']])
+
+    def test_date_range_filter(self):
+        in_range = self.results(slot__date__gte=(self.today + timedelta(days=2)).isoformat())
+        self.assertEqual(in_range, [self.bookings['captain2']])
+        # A malformed date is ignored instead of failing the page
+        self.assertEqual(len(self.results(slot__date__gte='not-a-date')), 2)
+
+    def test_facet_counts_follow_venue_filter(self):
+        self.assertContains(self.changelist(), 'Confirmed (2)')
+        self.assertContains(self.changelist(slot__venue__id__exact=self.south.pk), 'Confirmed (1)')
+
+
+class StructuredSearchTests(TestCase):
+    """Admin search terms become date ranges, choice keys and case-insensitive prefixes"""
+
+    def setUp(self):
+        venue = Venue.objects.create(name='Test Ground')
+        self.slot = Slot.objects.create(venue=venue, date=date(2026, 1, 31), time_slot='6-7', cricket_type='box')
+        self.booking = Booking.objects.create(
+            user=User.objects.create_user('Captain', email='Captain@Example.com', password='x'),
+            slot=self.slot,
+            status='confirmed',
+        )
+        self.model_admin = BookingAdmin(Booking, admin.site)
+
+    def search(self, term):
+        queryset, may_have_duplicates = self.model_admin.get_search_results(None, Booking.objects.all(), term)
+        self.assertFalse(may_have_duplicates)
+        return list(queryset)
+
+    def test_parse_date_term(self):
+        self.assertEqual(parse_date_term('2026-01-31'), (date(2026, 1, 31), date(2026, 1, 31)))
+        self.assertEqual(parse_date_term('31/01/2026'), (date(2026, 1, 31), date(2026, 1, 31)))
+        self.assertEqual(parse_date_term('02/2024'), (date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertEqual(parse_date_term('2026'), (date(2026, 1, 1), date(2026, 12, 31)))
+        self.assertIsNone(parse_date_term('2026-02-30'))
+        self.assertIsNone(parse_date_term('box'))
+
+    def test_date_and_choice_terms(self):
+        self.assertEqual(self.search('01/2026 box'), [self.booking])
+        self.assertEqual(self.search('confirmed'), [self.booking])
+        self.assertEqual(self.search('2025'), [])
+
+    def test_username_and_email_prefix_ignore_case(self):
+        self.assertEqual(self.search('capt'), [self.booking])
+        self.assertEqual(self.search('captain@example'), [self.booking])
+        self.assertEqual(self.search('aptain'), [])
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class SlotOpenCloseTests(TestCase):
+    """Closed slots can't be booked; the admin actions open and close them"""
+
+    def setUp(self):
+        self.venue = Venue.objects.create(name='Test Ground')
+        self.tomorrow = timezone.localdate() + timedelta(days=1)
+        self.slot = Slot.objects.create(
+            venue=self.venue, date=self.tomorrow, time_slot='6-7', cricket_type='box', is_closed=True,
+        )
+        self.user = User.objects.create_user('captain', password='x')
+
+    def test_closed_slot_refuses_bookings(self):
+        with self.assertRaises(services.SlotClosedError):
+            services.create_booking(self.user, self.slot.pk)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(self.slot.is_available)
+
+    def test_admin_actions(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        url = reverse('admin:slots_slot_changelist')
+        self.client.post(url, {'action': 'mark_available', '_selected_action': [self.slot.pk]})
+        self.slot.refresh_from_db()
+        self.assertFalse(self.slot.is_closed)
+        services.create_booking(self.user, self.slot.pk)
+
+        later = Slot.objects.create(
+            venue=self.venue, date=self.tomorrow + timedelta(days=1), time_slot='6-7', cricket_type='box',
+        )
+        self.client.post(url, {
+            'action': 'close_dates',
+            '_selected_action': [self.slot.pk],
+            'apply': '1',
+            'start_date': self.tomorrow.isoformat(),
+            'end_date': later.date.isoformat(),
+        })
+        self.assertEqual(Slot.objects.filter(is_closed=True).count(), 2)
+
+
+class StaticPipelineTests(TestCase):
+    """collectstatic ships minified, content-hashed and precompressed copies"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.static_root.cleanup)
+        with override_settings(STATIC_ROOT=cls.static_root.name):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            cls.storage = storage.MinifiedManifestStaticFilesStorage()
+            cls.hashed_css = cls.storage.stored_name('css/style.css')
+
+    def test_hashed_minified_and_compressed(self):
+        self.assertNotEqual(self.hashed_css, 'css/style.css')
+        with self.storage.open(self.hashed_css) as shipped:
+            self.assertNotIn(b'\n  ', shipped.read())
+        for suffix in ('.gz', '.br'):
+            self.assertTrue(self.storage.exists(self.hashed_css + suffix))
+
+    def test_should_minify(self):
+        self.assertTrue(self.storage.should_minify('js/main.js'))
+        self.assertFalse(self.storage.should_minify('js/vendor.min.js'))
+        self.assertFalse(self.storage.should_minify('admin/css/base.css'))
+        self.assertFalse(self.storage.should_minify('images/logo.png'))
+
+
+class BootCommandTests(TestCase):
+    """boot only migrates and collects static files when something changed"""
+
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        self.static_root = Path(static_root.name)
+        settings_override = override_settings(STATIC_ROOT=static_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def boot(self):
+        out = io.StringIO()
+        with mock.patch('slots.management.commands.boot.call_command', side_effect=self.fake_command) as command:
+            call_command('boot', '--no-exec', stdout=out)
+        return out.getvalue(), [call.args[0] for call in command.call_args_list]
+
+    def fake_command(self, name, **options):
+        if name == 'collectstatic':
+            (self.static_root / 'staticfiles.json').write_text('{}')
+
+    def test_skips_unchanged_work(self):
+        output, commands = self.boot()
+        self.assertEqual(commands, ['collectstatic'])
+        self.assertIn('Migrations: up to date', output)
+        output, commands = self.boot()
+        self.assertEqual(commands, [])
+        self.assertIn('Static files: unchanged', output)
+
+    def test_recollects_when_sources_change(self):
+        self.boot()
+        (self.static_root / '.static-source-hash').write_text('stale')
+        self.assertEqual(self.boot()[1], ['collectstatic'])
+
+
+class SlotSearchFormTests(TestCase):
+    """Dashboard search filters, including free spots counted in players"""
+
+    def setUp(self):
+        venue = Venue.objects.create(name='Test Ground')
+        self.tomorrow = timezone.localdate() + timedelta(days=1)
+        self.morning = Slot.objects.create(
+            venue=venue, date=self.tomorrow, time_slot='6-7', cricket_type='box', max_players=6,
+        )
+        self.evening = Slot.objects.create(
+            venue=venue, date=self.tomorrow + timedelta(days=1), time_slot='6-7pm', cricket_type='normal',
+            max_players=11,
+        )
+        Booking.objects.create(
+            user=User.objects.create_user('captain', password='x'),
+            slot=self.morning, players=4, status='confirmed',
+        )
+
+    def search(self, **data):
+        form = SlotSearchForm(data, available_dates=[self.tomorrow])
+        self.assertTrue(form.is_valid(), form.errors)
+        return list(form.filter(Slot.objects.with_booked_count()).chronological())
+
+    def test_filters(self):
+        self.assertEqual(self.search(date=self.tomorrow.isoformat()), [self.morning])
+        self.assertEqual(self.search(date_from=self.evening.date.isoformat()), [self.evening])
+        self.assertEqual(self.search(date_to=self.tomorrow.isoformat()), [self.morning])
+        self.assertEqual(self.search(cricket_type='normal'), [self.evening])
+        self.assertEqual(self.search(time_band='morning'), [self.morning])
+
+    def test_min_spots_counts_players(self):
+        self.assertEqual(self.search(min_spots=2), [self.morning, self.evening])
+        self.assertEqual(self.search(min_spots=3), [self.evening])
+
+    def test_unlisted_date_is_invalid(self):
+        form = SlotSearchForm({'date': '1999-01-01'}, available_dates=[self.tomorrow])
+        self.assertFalse(form.is_valid())
+
+
+class GroupBookingCapacityTests(TestCase):
+    """Capacity is the sum of players over confirmed bookings and live holds"""
+
+    def setUp(self):
+        venue = Venue.objects.create(name='Test Ground')
+        self.slot = Slot.objects.create(
+            venue=venue,
+            date=timezone.localdate() + timedelta(days=1),
+            time_slot='6-7',
+            cricket_type='box',
+            max_players=6,
+        )
+        self.users = [User.objects.create_user(f'captain{n}', password='x') for n in range(3)]
+
+    def test_counts_players_not_bookings(self):
+        services.create_booking(self.users[0], self.slot.pk, 4)
+        self.assertEqual((self.slot.booked_count, self.slot.spots_left), (4, 2))
+        with self.assertRaisesMessage(services.SlotFullError, 'Only 2 spot(s) left'):
+            services.create_booking(self.users[1], self.slot.pk, 3)
+        services.create_booking(self.users[1], self.slot.pk, 2)
+        self.assertFalse(self.slot.is_available)
+
+    def test_cancelled_and_expired_hold_free_their_players(self):
+        services.create_booking(self.users[0], self.slot.pk, 4)
+        hold = services.hold_slot(self.users[1], self.slot.pk, 2)
+        self.assertEqual(self.slot.spots_left, 0)
+        Booking.objects.filter(pk=hold.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.slot.spots_left, 2)
+        services.cancel_booking(Booking.objects.get(user=self.users[0]))
+        services.create_booking(self.users[2], self.slot.pk, 6)
+        self.assertEqual(
+            Booking.objects.filter(status='confirmed').aggregate(total=Sum('players'))['total'], 6,
+        )
+
+
+class SeedScaleTests(TestCase):
+    """seed_scale builds the same dataset for the same arguments and seed"""
+
+    def seed(self, seed):
+        call_command(
+            'seed_scale', '--users=30', '--days=5', '--start=2026-01-05', f'--seed={seed}', stdout=io.StringIO(),
+        )
+        dataset = {
+            'users': list(User.objects.order_by('username').values_list('username', 'email')),
+            'slots': list(Slot.objects.order_by('date', 'time_slot', 'cricket_type').values_list(
+                'date', 'time_slot', 'cricket_type', 'price', 'max_players',
+            )),
+            'bookings': sorted(Booking.objects.values_list(
+                'user__username', 'slot__date', 'slot__time_slot', 'slot__cricket_type', 'players', 'status',
+            )),
+        }
+        Booking.objects.all().delete()
+        Slot.objects.all().delete()
+        User.objects.all().delete()
+        return dataset
+
+    def test_same_seed_same_dataset(self):
+        first = self.seed(7)
+        self.assertTrue(first['bookings'])
+        self.assertEqual(self.seed(7), first)
+        self.assertNotEqual(self.seed(8)['bookings'], first['bookings'])
@@ -20,12 +20,23 @@ urlpatterns = [
     path('my-dashboard/', views.my_dashboard, name='my_dashboard'),
     path('my-bookings/', views.my_bookings, name='my_bookings'),
     path('cancel-booking/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
+    path('reschedule-booking/<int:booking_id>/', views.reschedule_booking, name='reschedule_booking'),
     path('booking-history/', views.booking_history, name='booking_history'),
     
+    # Calendar subscription (signed token instead of a session)
+    path('calendar/<str:token>/bookings.ics', views.calendar_feed, name='calendar_feed'),
+    
     # Booking page (requires login)
     path('book/<int:slot_id>/', views.book_slot, name='book_slot'),
     
     # Venue info (public)
     path('venue/', views.venue, name='venue'),
+    
+    # Per-venue pages; the URLs above show the default venue
+    path('v/<slug:venue_slug>/', views.dashboard, name='venue_dashboard'),
+    path('v/<slug:venue_slug>/info/', views.venue, name='venue_detail'),
+    
+    # Prometheus scrape endpoint
+    path('metrics', views.metrics_view, name='metrics'),
 ]
 
@@ -2,62 +2,119 @@
 Views for Cricket Slot Booking System
 """
 import json
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import IntegrityError
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
+from django.db.models import Max
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
 from datetime import datetime, timedelta
 from django.core.paginator import Paginator
 
-from .models import Slot, Booking, Venue
-from .forms import RegisterForm, BookingForm
+from .models import Slot, Booking, Venue, ArchivedBooking
+from .cache import get_or_set_availability
+from .decorators import cache_public, cache_private_no_store, idempotent
+from .forms import RegisterForm, BookingForm, RescheduleForm, SlotSearchForm
+from . import calendar, metrics, services
 
 
-def venue(request):
+def get_venue(venue_slug=None):
+    """
+    The venue named in the URL, or the default venue for the URLs without
+    one (created if there are no venues yet)
+    """
+    if venue_slug is not None:
+        return get_object_or_404(Venue, slug=venue_slug)
+    return Venue.get_default() or Venue.objects.create()
+
+
+def venue_choices():
+    """(slug, name) of every venue, for the venue switcher (cached)"""
+    return get_or_set_availability(
+        'venues', [],
+        lambda: list(Venue.objects.order_by('pk').values_list('slug', 'name'))
+    )
+
+
+def venue_last_modified(request, venue_slug=None):
+    """Last change to the venue, for conditional GETs on the venue page"""
+    venues = Venue.objects.all() if venue_slug is None else Venue.objects.filter(slug=venue_slug)
+    return venues.aggregate(last_modified=Max('updated_at'))['last_modified']
+
+
+@cache_public(max_age=300, stale_while_revalidate=3600)
+@condition(last_modified_func=venue_last_modified)
+def venue(request, venue_slug=None):
     """
     Venue information page - shows amenities, policies, pricing, and contact info
     """
-    # Get the first venue or create default one
-    venue_obj = Venue.objects.first()
-    
-    if not venue_obj:
-        # Create a default venue if none exists
-        venue_obj = Venue.objects.create()
+    venue_obj = get_venue(venue_slug)
     
     context = {
         'venue': venue_obj,
+        'venues': venue_choices(),
     }
     return render(request, 'slots/venue.html', context)
 
 
-def dashboard(request):
+@cache_public(max_age=60, stale_while_revalidate=300)
+def dashboard(request, venue_slug=None):
     """
-    Main Dashboard - Shows available slots (public for everyone) with pagination
+    Main Dashboard - Shows a venue's available slots (public for everyone)
+    with pagination. Supports server-side search (date, date range, type,
+    time band, minimum free spots) and a "next available" mode returning
+    the earliest open slot. Every query is filtered on the venue first, so
+    its cost doesn't grow with the number of venues.
     """
+    venue_obj = get_venue(venue_slug)
     today = datetime.now().date()
     
-    # Get all slots (no limit, we'll paginate)
-    all_slots = Slot.objects.filter(date__gte=today).order_by('date', 'time_slot')
+    # Get all available dates for filter (cached until the venue's availability changes)
+    available_dates = get_or_set_availability(
+        'dates', [today],
+        lambda: list(
+            Slot.objects.filter(venue=venue_obj, date__gte=today, is_closed=False)
+            .values_list('date', flat=True).distinct().order_by('date')[:30]
+        ),
+        venue_id=venue_obj.pk,
+    )
+    
+    search_form = SlotSearchForm(request.GET or None, available_dates=available_dates)
+    all_slots = Slot.objects.filter(venue=venue_obj).upcoming(today).with_booked_count()
+    if search_form.is_valid():
+        all_slots = search_form.filter(all_slots)
+    all_slots = all_slots.chronological()
+    
+    next_available = 'next' in request.GET
+    if next_available:
+        # Earliest open slot with space, walking the venue's open-slots index by date
+        next_slot = all_slots.bookable().first()
+        all_slots = [next_slot] if next_slot else []
     
     # Paginate slots - 6 per page
     paginator = Paginator(all_slots, 6)
     page_number = request.GET.get('page')
     slots_page = paginator.get_page(page_number)
     
-    # Get venue info
-    venue_obj = Venue.objects.first()
-    
-    # Get all available dates for filter
-    available_dates = Slot.objects.filter(date__gte=today).values_list('date', flat=True).distinct().order_by('date')[:30]
+    # Keep the search in pagination links
+    query = request.GET.copy()
+    query.pop('page', None)
     
     context = {
         'slots': slots_page,
         'available_dates': available_dates,
+        'search_form': search_form,
+        'next_available': next_available,
+        'query_string': query.urlencode(),
         'venue': venue_obj,
+        'venues': venue_choices(),
         'today': today,
     }
     return render(request, 'slots/dashboard.html', context)
@@ -81,22 +138,13 @@ def register(request):
     
     if request.method == 'POST':
         form = RegisterForm(request.POST)
-        if form.is_valid():
-            try:
-                # Create new user
-                user = User.objects.create_user(
-                    username=form.cleaned_data['username'],
-                    email=form.cleaned_data['email'],
-                    password=form.cleaned_data['password1']
-                )
-                messages.success(request, 'Account created successfully! Please login.')
-                return redirect('slots:login')
-            except IntegrityError:
-                form.add_error('username', 'Username already exists!')
-        else:
-            for field, errors in form.errors.items():
-                for error in errors:
-                    messages.error(request, f"{field}: {error}")
+        # Duplicates are caught by the unique indexes during save()
+        if form.is_valid() and form.save() is not None:
+            messages.success(request, 'Account created successfully! Please login.')
+            return redirect('slots:login')
+        for field, errors in form.errors.items():
+            for error in errors:
+                messages.error(request, f"{field}: {error}")
     else:
         form = RegisterForm()
     
@@ -141,6 +189,7 @@ def logout_view(request):
     return redirect('slots:dashboard')
 
 
+@cache_private_no_store
 @login_required
 @require_http_methods(["GET"])
 def my_dashboard(request):
@@ -172,81 +221,140 @@ def my_dashboard(request):
     return render(request, 'slots/my_dashboard.html', context)
 
 
+def requested_players(request):
+    """The ?players=N group size asked for on the booking page (default 1)"""
+    try:
+        return max(int(request.GET.get('players', 1)), 1)
+    except ValueError:
+        return 1
+
+
+@cache_private_no_store
 @login_required
+@idempotent
 @require_http_methods(["GET", "POST"])
 def book_slot(request, slot_id):
     """
-    Book a cricket slot
+    Book a cricket slot - opening the page holds a spot for
+    BOOKING_HOLD_SECONDS, submitting it confirms the hold
     """
-    slot = get_object_or_404(Slot, id=slot_id)
+    slot = get_object_or_404(Slot.objects.select_related('venue'), id=slot_id)
     
     # Check if slot is available
-    if not slot.is_available:
-        messages.error(request, 'This slot is no longer available. All spots are booked.')
-        return redirect('slots:dashboard')
+    if slot.is_closed:
+        messages.error(request, 'This slot is closed for booking.')
+        return redirect('slots:venue_dashboard', venue_slug=slot.venue.slug)
     
     if request.method == 'POST':
-        try:
-            # Check for existing booking first
-            existing_booking = Booking.objects.filter(
-                user=request.user,
-                slot=slot,
-                status__in=['confirmed', 'pending']
-            ).exists()
-            
-            if existing_booking:
-                messages.warning(
-                    request,
-                    f'⚠️ You have already booked this slot ({slot.get_cricket_type_display()} on {slot.date} {slot.get_time_slot_display()})'
-                )
-                return redirect('slots:dashboard')
-            
-            # Double-check slot availability before booking
-            if not slot.is_available:
-                messages.error(request, 'This slot is no longer available. Someone just booked the last spot!')
-                return redirect('slots:dashboard')
-            
-            # Create booking with explicit field assignment
-            booking = Booking.objects.create(
-                user=request.user,
-                slot=slot,
-                status='confirmed'
-            )
+        hold = Booking.objects.holding_capacity().filter(
+            user=request.user, slot=slot, status='pending'
+        ).first()
+        form = BookingForm(request.POST, slot=slot, instance=hold or Booking(user=request.user, slot=slot))
+        if form.is_valid():
+            players = form.cleaned_data['players']
+            try:
+                # Confirms the hold (or books directly if it expired) with the slot locked
+                services.create_booking(request.user, slot.id, players)
+            except services.AlreadyBookedError as e:
+                messages.warning(request, f'⚠️ {e}')
+                return redirect('slots:venue_dashboard', venue_slug=slot.venue.slug)
+            except services.BookingError as e:
+                messages.error(request, str(e))
+                return redirect('slots:venue_dashboard', venue_slug=slot.venue.slug)
             
             messages.success(
                 request,
-                f'✅ Booking Confirmed! {slot.get_cricket_type_display()} on {slot.date} ({slot.get_time_slot_display()})'
+                f'✅ Booking Confirmed! {slot.get_cricket_type_display()} on {slot.date} '
+                f'({slot.get_time_slot_display()}) for {players} player(s)'
             )
             return redirect('slots:my_bookings')
-                
-        except Exception as e:
-            messages.error(request, f'Booking failed: {str(e)}')
-            return redirect('slots:dashboard')
+    else:
+        # GET request - hold the group's spots while the user fills in the
+        # confirmation page (?players=N; the form can still change it)
+        try:
+            hold = services.hold_slot(request.user, slot.id, requested_players(request))
+        except services.AlreadyBookedError as e:
+            messages.warning(request, f'⚠️ {e}')
+            return redirect('slots:venue_dashboard', venue_slug=slot.venue.slug)
+        except services.BookingError as e:
+            messages.error(request, str(e))
+            return redirect('slots:venue_dashboard', venue_slug=slot.venue.slug)
+        form = BookingForm(slot=slot, instance=hold)
     
-    # GET request - show booking confirmation page
-    form = BookingForm()
     context = {
         'slot': slot,
         'form': form,
+        'hold': hold,
     }
     return render(request, 'slots/book_slot.html', context)
 
 
+@cache_private_no_store
 @login_required
 @require_http_methods(["GET"])
 def my_bookings(request):
     """
     Show user's bookings
     """
-    bookings = Booking.objects.filter(user=request.user).select_related('slot').order_by('-created_at')
+    bookings = (
+        Booking.objects.filter(user=request.user)
+        .exclude(status='pending', expires_at__lte=timezone.now())  # lapsed holds
+        .select_related('slot__venue').order_by('-created_at')
+    )
     
+    feed_path = reverse('slots:calendar_feed', args=[calendar.make_token(request.user)])
     context = {
         'bookings': bookings,
+        'calendar_feed_url': request.build_absolute_uri(feed_path),
+        'today': timezone.localdate(),
     }
     return render(request, 'slots/my_bookings.html', context)
 
 
+def calendar_feed_state(request, token):
+    """(user id, last booking change, booking count) for a feed token, computed once per request"""
+    if not hasattr(request, '_calendar_feed_state'):
+        user_id = calendar.user_id_from_token(token)
+        last_modified, count = calendar.feed_state(user_id) if user_id else (None, 0)
+        request._calendar_feed_state = (user_id, last_modified, count)
+    return request._calendar_feed_state
+
+
+def calendar_etag(request, token):
+    user_id, last_modified, count = calendar_feed_state(request, token)
+    if user_id is None:
+        return None
+    # The feed only lists upcoming bookings, so it also changes each day
+    changed = last_modified.timestamp() if last_modified else 0
+    return f'{user_id}-{count}-{changed}-{timezone.localdate().isoformat()}'
+
+
+def calendar_last_modified(request, token):
+    return calendar_feed_state(request, token)[1]
+
+
+@condition(etag_func=calendar_etag, last_modified_func=calendar_last_modified)
+@require_http_methods(["GET", "HEAD"])
+def calendar_feed(request, token):
+    """
+    iCalendar feed of the token owner's upcoming confirmed bookings.
+    Authenticated by the signed token only, so calendar apps can poll it
+    without a session; unchanged feeds are answered with 304.
+    """
+    user_id = calendar_feed_state(request, token)[0]
+    if user_id is None:
+        raise Http404('Unknown calendar feed')
+    response = StreamingHttpResponse(
+        calendar.iter_feed(user_id, host=request.get_host()),
+        content_type='text/calendar; charset=utf-8',
+    )
+    response['Content-Disposition'] = 'inline; filename="bookings.ics"'
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @login_required
+@idempotent
 @require_http_methods(["POST"])
 def cancel_booking(request, booking_id):
     """
@@ -258,8 +366,7 @@ def cancel_booking(request, booking_id):
         messages.error(request, 'This booking cannot be cancelled.')
         return redirect('slots:my_bookings')
     
-    booking.status = 'cancelled'
-    booking.save()
+    services.cancel_booking(booking)
     
     messages.success(
         request,
@@ -268,22 +375,94 @@ def cancel_booking(request, booking_id):
     return redirect('slots:my_bookings')
 
 
+@cache_private_no_store
+@login_required
+@idempotent
+@require_http_methods(["GET", "POST"])
+def reschedule_booking(request, booking_id):
+    """
+    Move a confirmed booking to another slot of the same type in one step,
+    instead of cancelling and booking again
+    """
+    booking = get_object_or_404(Booking.objects.select_related('slot__venue'), id=booking_id, user=request.user)
+    venue_obj = booking.slot.venue
+    today = timezone.localdate()
+    
+    if venue_obj.no_reschedule:
+        messages.error(request, f'{venue_obj.name} does not allow rescheduling.')
+        return redirect('slots:my_bookings')
+    if booking.status != 'confirmed' or booking.slot.date < today:
+        messages.error(request, 'This booking cannot be rescheduled.')
+        return redirect('slots:my_bookings')
+    
+    slots = (
+        Slot.objects.filter(venue=venue_obj)
+        .upcoming(today)
+        .with_booked_count()
+        .bookable(min_spots=booking.players)
+        .filter(cricket_type=booking.slot.cricket_type)
+        .exclude(pk=booking.slot_id)
+        .chronological()
+    )
+    form = RescheduleForm(request.POST or None, slots=slots)
+    if request.method == 'POST' and form.is_valid():
+        target = form.cleaned_data['slot']
+        try:
+            booking = services.reschedule_booking(request.user, booking.id, target.id)
+        except services.BookingError as e:
+            messages.error(request, str(e))
+            return redirect('slots:reschedule_booking', booking_id=booking.id)
+        
+        messages.success(
+            request,
+            f'✅ Booking moved to {target.get_cricket_type_display()} on {target.date} '
+            f'({target.get_time_slot_display()})'
+        )
+        return redirect('slots:my_bookings')
+    
+    context = {
+        'booking': booking,
+        'form': form,
+    }
+    return render(request, 'slots/reschedule_booking.html', context)
+
+
+@cache_private_no_store
 @login_required
 @require_http_methods(["GET"])
 def booking_history(request):
     """
     Show user's complete booking history
+    (recent bookings plus anything moved to the archive tables)
     """
     bookings = Booking.objects.filter(user=request.user).select_related('slot').order_by('-created_at')
+    archived = ArchivedBooking.objects.filter(user=request.user).select_related('slot').order_by('-created_at')
     
-    # Separate by status
-    confirmed_bookings = bookings.filter(status='confirmed')
-    cancelled_bookings = bookings.filter(status='cancelled')
+    # Separate by status; archived rows are older, so they go last
+    confirmed_bookings = [*bookings.filter(status='confirmed'), *archived.filter(status='confirmed')]
+    cancelled_bookings = [*bookings.filter(status='cancelled'), *archived.filter(status='cancelled')]
     
     context = {
         'confirmed_bookings': confirmed_bookings,
         'cancelled_bookings': cancelled_bookings,
-        'total_bookings': bookings.count(),
+        'total_bookings': bookings.count() + archived.count(),
     }
     return render(request, 'slots/booking_history.html', context)
 
+
+@cache_private_no_store
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Prometheus metrics in the text exposition format, aggregated across
+    all gunicorn workers. Needs METRICS_TOKEN; without one the endpoint
+    only exists with DEBUG on.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    body, content_type = metrics.collect()
+    return HttpResponse(body, content_type=content_type)